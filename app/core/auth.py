@@ -2,11 +2,17 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
 import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.user import User
+from app.core.password_cost import calibrate_bcrypt_rounds
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv('ALGORITHM')
@@ -14,12 +20,80 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# BCRYPT_ROUNDS pins the work factor; otherwise it is calibrated at startup.
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt releases the GIL, so a small dedicated thread pool keeps hashing off
+# the event loop without competing with asyncio.to_thread's default pool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+# Only touched from the event loop thread, so no locking is needed.
+_hash_pool_stats = {"in_flight": 0, "peak_queue_depth": 0, "completed": 0, "rejected": 0}
+
+def hash_pool_stats() -> dict:
+    in_flight = _hash_pool_stats["in_flight"]
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "in_flight": in_flight,
+        "queue_depth": max(0, in_flight - PASSWORD_HASH_WORKERS),
+        "peak_queue_depth": _hash_pool_stats["peak_queue_depth"],
+        "completed": _hash_pool_stats["completed"],
+        "rejected": _hash_pool_stats["rejected"],
+    }
+
+async def _run_in_hash_pool(func, *args):
+    queue_depth = max(0, _hash_pool_stats["in_flight"] - PASSWORD_HASH_WORKERS)
+    if queue_depth >= PASSWORD_HASH_MAX_QUEUE:
+        _hash_pool_stats["rejected"] += 1
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server busy, please retry")
+
+    _hash_pool_stats["in_flight"] += 1
+    _hash_pool_stats["peak_queue_depth"] = max(
+        _hash_pool_stats["peak_queue_depth"],
+        _hash_pool_stats["in_flight"] - PASSWORD_HASH_WORKERS,
+    )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pool_stats["in_flight"] -= 1
+        _hash_pool_stats["completed"] += 1
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def configure_bcrypt_rounds(rounds: int) -> None:
+    # min_rounds makes needs_update() flag weaker hashes for rehash-on-login.
+    pwd_context.load({
+        "bcrypt__default_rounds": rounds,
+        "bcrypt__min_rounds": rounds,
+    }, update=True)
+
+async def setup_password_hashing() -> int:
+    if BCRYPT_ROUNDS:
+        rounds = int(BCRYPT_ROUNDS)
+    else:
+        loop = asyncio.get_running_loop()
+        rounds = await loop.run_in_executor(_hash_executor, calibrate_bcrypt_rounds)
+    configure_bcrypt_rounds(rounds)
+    logger.info("bcrypt work factor set to %s rounds", rounds)
+    return rounds
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -39,10 +113,92 @@ def decode_access_token(token: str):
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+from sqlalchemy import update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, make_transient_to_detached
+from app.core.cache import TTLCache
+from app.models.role import Role
+from app.schemas.token import TokenClaims
+
+# Identity cache keyed by the JWT "sub" (email). Entries are plain column
+# snapshots, never live ORM instances, so no state leaks between sessions.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_MAX_SIZE", "2048")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
+
+def _snapshot_user(user: User) -> dict:
+    return {
+        "columns": {column.key: getattr(user, column.key) for column in User.__table__.columns},
+        "role": {"id": user.role.id, "name": user.role.name} if user.role else None,
+    }
+
+async def _restore_user(db: AsyncSession, snapshot: dict) -> User:
+    # Rebuild a detached User/Role pair and merge it without emitting SQL,
+    # so handlers get a session-bound instance exactly like a fresh load.
+    user = User(**snapshot["columns"])
+    if snapshot["role"]:
+        role = Role(**snapshot["role"])
+        make_transient_to_detached(role)
+        user.role = role
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+# Current token_version per user id. A short TTL bounds how long a revoked
+# token stays usable on workers other than the one that revoked it.
+token_version_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_VERSION_CACHE_MAX_SIZE", "8192")),
+    ttl=float(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "30")),
+)
+
+def invalidate_user_cache(email: str) -> None:
+    user_cache.invalidate(email)
+
+def build_token_data(user: User) -> dict:
+    return {
+        "sub": user.email,
+        "role": user.role.name if user.role else None,
+        "uid": user.id,
+        "rid": user.role_id,
+        "ver": user.token_version or 0,
+    }
+
+async def _get_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    version = token_version_cache.get(user_id)
+    if version is None:
+        result = await db.execute(select(User.token_version).where(User.id == user_id))
+        version = result.scalar_one_or_none()
+        if version is not None:
+            token_version_cache.set(user_id, version)
+    return version
+
+async def revoke_user_tokens(db: AsyncSession, user: User) -> None:
+    """Invalidate every token issued to `user`; the caller commits, then calls invalidate_token_caches."""
+    user.token_version = (user.token_version or 0) + 1
+    db.add(user)
+
+def invalidate_token_caches(user_id: int, email: str) -> None:
+    # Only after the commit: earlier, a concurrent request could re-cache the old version.
+    token_version_cache.invalidate(user_id)
+    invalidate_user_cache(email)
+
+async def rehash_password(user_id: int, email: str, old_hash: str, password: str) -> None:
+    """Background task: upgrade a stored hash to the current work factor."""
+    try:
+        new_hash = await get_password_hash_async(password)
+        async with SessionLocal() as db:
+            # Guard on the old hash so a concurrent password change wins.
+            await db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+        invalidate_user_cache(email)
+    except Exception:
+        logger.exception("Failed to rehash password for user %s", user_id)
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     payload = decode_access_token(token)
@@ -50,13 +206,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
     email = payload["sub"]
 
-    result = await db.execute(
-        select(User).options(selectinload(User.role)).where(User.email == email)
-    )
-    user = result.scalar_one_or_none()
+    snapshot = user_cache.get(email)
+    if snapshot is not None:
+        user = await _restore_user(db, snapshot)
+    else:
+        result = await db.execute(
+            select(User).options(selectinload(User.role)).where(User.email == email)
+        )
+        user = result.scalar_one_or_none()
 
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user_cache.set(email, _snapshot_user(user))
+
+    # The identity snapshot may be up to USER_CACHE_TTL_SECONDS old; revocation
+    # is checked against the shorter-lived token_version_cache instead.
+    if "ver" in payload and payload["ver"] != ((await _get_token_version(db, user.id)) or 0):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
     return user
 
 def require_roles(roles: list):
@@ -66,3 +232,45 @@ def require_roles(roles: list):
         return user
     return role_checker
 
+async def get_token_claims(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> TokenClaims:
+    """Authorize from verified JWT claims without loading the User row.
+
+    Only the per-user token_version is checked (usually from cache) so that
+    revoked tokens are still rejected. Tokens issued before uid/ver claims
+    existed fall back to the regular identity lookup.
+    """
+    payload = decode_access_token(token)
+    if payload is None or "sub" not in payload:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+
+    if "uid" not in payload or "ver" not in payload:
+        user = await get_current_user(token, db)
+        return TokenClaims(
+            sub=user.email,
+            user_id=user.id,
+            role=user.role.name if user.role else None,
+            role_id=user.role_id,
+            token_version=user.token_version or 0,
+        )
+
+    current_version = await _get_token_version(db, payload["uid"])
+    if current_version is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if current_version != payload["ver"]:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+
+    return TokenClaims(
+        sub=payload["sub"],
+        user_id=payload["uid"],
+        role=payload.get("role"),
+        role_id=payload.get("rid"),
+        token_version=payload["ver"],
+    )
+
+def require_role_claims(roles: list):
+    async def role_checker(claims: TokenClaims = Depends(get_token_claims)):
+        if claims.role not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+        return claims
+    return role_checker
+
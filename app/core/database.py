@@ -12,23 +12,191 @@ import app.models.feedback
 import app.models.notification  
 import app.models.admin_log  
 import app.models.sync_queue  
+import app.models.verdict  
+import app.models.sync_change  
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import exc, text
 import asyncio
 import logging
 import os
+import time
 from dotenv import load_dotenv
 load_dotenv(override=False)
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional streaming replica for heavy read-only endpoints (see get_read_db)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DB_READ_MAX_LAG_SECONDS = float(os.getenv("DB_READ_MAX_LAG_SECONDS", "5"))
+DB_READ_LAG_CHECK_SECONDS = float(os.getenv("DB_READ_LAG_CHECK_SECONDS", "5"))
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Per-environment engine defaults; every key can be overridden with the
+# matching DB_* environment variable (e.g. DB_POOL_SIZE=20).
+ENGINE_DEFAULTS = {
+    "development": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_cache_size": 100,
+    },
+    "production": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 5,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_cache_size": 500,
+    },
+}
+
+
+def engine_settings(environment: str = ENVIRONMENT) -> dict:
+    settings = dict(ENGINE_DEFAULTS.get(environment, ENGINE_DEFAULTS["development"]))
+    for key, default in settings.items():
+        raw = os.getenv(f"DB_{key.upper()}")
+        if raw is None:
+            continue
+        if isinstance(default, bool):
+            settings[key] = raw.lower() in {"1", "true", "yes"}
+        else:
+            settings[key] = type(default)(raw)
+    return settings
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also counts checkouts which had to wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        # max_overflow=-1 means unbounded overflow: such a pool never blocks.
+        exhausted = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        if not exhausted:
+            return super()._do_get()
+
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "waiting": self.waiting,
+            "waits": self.waits,
+            "wait_seconds_total": round(self.wait_seconds, 3),
+            "timeouts": self.timeouts,
+        }
+
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def create_engine_from_settings(url: str, settings: dict = None):
+    settings = settings or engine_settings()
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args["prepared_statement_cache_size"] = settings["statement_cache_size"]
+    return create_async_engine(
+        url,
+        echo=settings["echo"],
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+        connect_args=connect_args,
+    )
+
+
+engine = create_engine_from_settings(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = create_engine_from_settings(DATABASE_READ_URL) if DATABASE_READ_URL else None
+ReadSessionLocal = (
+    sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+    if read_engine is not None else None
+)
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+_replica_state = {"lag_seconds": None, "usable": True, "checked_at": 0.0, "fallbacks": 0}
+
 async def get_db():
     async with SessionLocal() as db:
         yield db
 
+async def _replica_usable() -> bool:
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] >= DB_READ_LAG_CHECK_SECONDS:
+        # Claim the check before awaiting so concurrent requests don't stampede.
+        _replica_state["checked_at"] = now
+        try:
+            async with read_engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar()
+            _replica_state["lag_seconds"] = float(lag or 0)
+            _replica_state["usable"] = _replica_state["lag_seconds"] <= DB_READ_MAX_LAG_SECONDS
+        except Exception:
+            logger.warning("Read replica lag check failed; routing reads to primary", exc_info=True)
+            _replica_state["usable"] = False
+    return _replica_state["usable"]
+
+async def get_read_db():
+    """Session for read-only endpoints.
+
+    Uses the replica when DATABASE_READ_URL is set and its replay lag is
+    within DB_READ_MAX_LAG_SECONDS, otherwise the primary. Never use it for
+    writes or for reads that must observe the caller's own writes.
+    """
+    if ReadSessionLocal is not None and await _replica_usable():
+        session_factory = ReadSessionLocal
+    else:
+        session_factory = SessionLocal
+        if ReadSessionLocal is not None:
+            _replica_state["fallbacks"] += 1
+    async with session_factory() as db:
+        yield db
+
+def pool_stats() -> dict:
+    return engine.sync_engine.pool.stats()
+
+def replica_stats() -> dict:
+    if read_engine is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "usable": _replica_state["usable"],
+        "lag_seconds": _replica_state["lag_seconds"],
+        "max_lag_seconds": DB_READ_MAX_LAG_SECONDS,
+        "fallbacks": _replica_state["fallbacks"],
+        "pool": read_engine.sync_engine.pool.stats(),
+    }
+
 async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
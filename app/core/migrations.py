@@ -0,0 +1,182 @@
+import logging
+from typing import List, NamedTuple, Sequence
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant key so only one process applies migrations at a time.
+MIGRATION_LOCK_KEY = 7_202_611
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: Sequence[str]
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    transactional: bool = True
+
+
+# Versioned schema changes applied after Base.metadata.create_all. Models
+# declare the same columns/indexes so fresh databases match; every statement
+# here must therefore be idempotent (IF NOT EXISTS / guarded backfills).
+MIGRATIONS: List[Migration] = [
+    Migration(1, "users_token_version", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    Migration(2, "hot_filter_indexes", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_assigned_to_id ON tasks (assigned_to_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_feedbacks_intern_id_created_at ON feedbacks (intern_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_evaluations_intern_id_created_at ON evaluations (intern_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_user_id_created_at ON notifications (user_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leaves_user_id ON leaves (user_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leaves_status ON leaves (status)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_user_id ON attendance (user_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sync_queue_user_id_status ON sync_queue (user_id, status)",
+    ], transactional=False),
+    Migration(3, "admin_logs_promoted_meta_columns", [
+        "ALTER TABLE admin_logs ADD COLUMN IF NOT EXISTS intern_id INTEGER",
+        "ALTER TABLE admin_logs ADD COLUMN IF NOT EXISTS evaluation_id INTEGER",
+        "ALTER TABLE admin_logs ADD COLUMN IF NOT EXISTS project_id INTEGER",
+        """UPDATE admin_logs SET
+            intern_id = CASE WHEN meta->>'intern_id' ~ '^[0-9]+$' THEN (meta->>'intern_id')::int END,
+            evaluation_id = CASE WHEN meta->>'evaluation_id' ~ '^[0-9]+$' THEN (meta->>'evaluation_id')::int END,
+            project_id = CASE WHEN meta->>'project_id' ~ '^[0-9]+$' THEN (meta->>'project_id')::int END
+        WHERE meta IS NOT NULL AND json_typeof(meta) = 'object'
+            AND intern_id IS NULL AND evaluation_id IS NULL AND project_id IS NULL""",
+    ]),
+    Migration(4, "admin_logs_promoted_meta_indexes", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_admin_logs_intern_id_created_at ON admin_logs (intern_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_admin_logs_evaluation_id ON admin_logs (evaluation_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_admin_logs_project_id ON admin_logs (project_id)",
+    ], transactional=False),
+    # The verdicts table itself comes from create_all; this copies the
+    # verdicts previously recorded only as admin log entries.
+    Migration(5, "verdicts_backfill", [
+        """INSERT INTO verdicts (intern_id, verdict, remarks, submitted_by, created_at)
+        SELECT l.intern_id, l.meta->>'verdict', l.meta->>'remarks', l.actor_user_id, l.created_at
+        FROM admin_logs l JOIN users u ON u.id = l.intern_id
+        WHERE l.type = 'evaluation_verdict' AND l.meta->>'verdict' IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM verdicts v WHERE v.intern_id = l.intern_id AND v.created_at = l.created_at
+            )""",
+    ]),
+    Migration(6, "sync_queue_client_op_id", [
+        "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS client_op_id VARCHAR",
+    ]),
+    Migration(7, "sync_queue_client_op_id_index", [
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_sync_queue_user_id_client_op_id "
+        "ON sync_queue (user_id, client_op_id)",
+    ], transactional=False),
+    Migration(8, "sync_queue_next_attempt_at", [
+        "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ",
+        "UPDATE sync_queue SET next_attempt_at = now() WHERE status = 'failed' AND next_attempt_at IS NULL",
+    ]),
+    Migration(9, "sync_queue_next_attempt_at_index", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sync_queue_status_next_attempt_at "
+        "ON sync_queue (status, next_attempt_at)",
+    ], transactional=False),
+    Migration(10, "sync_changes_triggers", [
+        # Trigger arguments name the columns whose users receive the change.
+        # A user who drops out of the audience on UPDATE gets a tombstone.
+        """CREATE OR REPLACE FUNCTION sync_record_change() RETURNS trigger AS $$
+        DECLARE
+            col text;
+            new_users int[] := '{}';
+            old_users int[] := '{}';
+        BEGIN
+            FOREACH col IN ARRAY TG_ARGV LOOP
+                IF TG_OP <> 'DELETE' AND to_jsonb(NEW)->>col IS NOT NULL THEN
+                    new_users := new_users || (to_jsonb(NEW)->>col)::int;
+                END IF;
+                IF TG_OP <> 'INSERT' AND to_jsonb(OLD)->>col IS NOT NULL THEN
+                    old_users := old_users || (to_jsonb(OLD)->>col)::int;
+                END IF;
+            END LOOP;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO sync_changes (table_name, record_id, user_id, operation)
+                SELECT DISTINCT TG_TABLE_NAME, NEW.id, u, 'upsert' FROM unnest(new_users) u;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                INSERT INTO sync_changes (table_name, record_id, user_id, operation)
+                SELECT DISTINCT TG_TABLE_NAME, OLD.id, u, 'delete' FROM unnest(old_users) u
+                WHERE u <> ALL(new_users);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS sync_changes_tasks ON tasks",
+        "CREATE TRIGGER sync_changes_tasks AFTER INSERT OR UPDATE OR DELETE ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION sync_record_change('assigned_to_id')",
+        "DROP TRIGGER IF EXISTS sync_changes_leaves ON leaves",
+        "CREATE TRIGGER sync_changes_leaves AFTER INSERT OR UPDATE OR DELETE ON leaves "
+        "FOR EACH ROW EXECUTE FUNCTION sync_record_change('user_id')",
+        "DROP TRIGGER IF EXISTS sync_changes_notifications ON notifications",
+        "CREATE TRIGGER sync_changes_notifications AFTER INSERT OR UPDATE OR DELETE ON notifications "
+        "FOR EACH ROW EXECUTE FUNCTION sync_record_change('user_id')",
+        "DROP TRIGGER IF EXISTS sync_changes_feedbacks ON feedbacks",
+        "CREATE TRIGGER sync_changes_feedbacks AFTER INSERT OR UPDATE OR DELETE ON feedbacks "
+        "FOR EACH ROW EXECUTE FUNCTION sync_record_change('intern_id', 'pm_id')",
+        "DROP TRIGGER IF EXISTS sync_changes_evaluations ON evaluations",
+        "CREATE TRIGGER sync_changes_evaluations AFTER INSERT OR UPDATE OR DELETE ON evaluations "
+        "FOR EACH ROW EXECUTE FUNCTION sync_record_change('intern_id', 'evaluator_id')",
+        # Seed the log with current rows so cursor 0 means "everything".
+        """INSERT INTO sync_changes (table_name, record_id, user_id, operation)
+        SELECT 'tasks', id, assigned_to_id, 'upsert' FROM tasks WHERE assigned_to_id IS NOT NULL
+        UNION ALL SELECT 'leaves', id, user_id, 'upsert' FROM leaves
+        UNION ALL SELECT 'notifications', id, user_id, 'upsert' FROM notifications
+        UNION ALL SELECT 'feedbacks', id, intern_id, 'upsert' FROM feedbacks
+        UNION ALL SELECT 'feedbacks', id, pm_id, 'upsert' FROM feedbacks WHERE pm_id <> intern_id
+        UNION ALL SELECT 'evaluations', id, intern_id, 'upsert' FROM evaluations
+        UNION ALL SELECT 'evaluations', id, evaluator_id, 'upsert' FROM evaluations WHERE evaluator_id <> intern_id""",
+    ]),
+    Migration(11, "sync_queue_temp_ids", [
+        "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS client_temp_id VARCHAR",
+        "ALTER TABLE sync_queue ADD COLUMN IF NOT EXISTS record_temp_id VARCHAR",
+    ]),
+    Migration(12, "sync_queue_temp_ids_index", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sync_queue_user_id_client_temp_id "
+        "ON sync_queue (user_id, client_temp_id)",
+    ], transactional=False),
+]
+
+
+async def _apply(engine, migration: Migration) -> None:
+    record = text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)")
+    params = {"version": migration.version, "name": migration.name}
+    if migration.transactional:
+        async with engine.begin() as conn:
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+            await conn.execute(record, params)
+    else:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+            await conn.execute(record, params)
+
+
+async def run_migrations(engine) -> List[int]:
+    """Apply pending migrations in version order; returns the versions applied."""
+    applied_now = []
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            await lock_conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, "
+                "name VARCHAR NOT NULL, "
+                "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            ))
+            result = await lock_conn.execute(text("SELECT version FROM schema_migrations"))
+            applied = set(result.scalars().all())
+            for migration in sorted(MIGRATIONS):
+                if migration.version in applied:
+                    continue
+                logger.info("Applying migration %s: %s", migration.version, migration.name)
+                await _apply(engine, migration)
+                applied_now.append(migration.version)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return applied_now
@@ -2,20 +2,98 @@ import os
 import logging
 import asyncio
 from typing import Iterable, List, Union
-import firebase_admin
-from firebase_admin import credentials, messaging
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime
+from collections import OrderedDict, Counter
 import hashlib
+import time
 
 logger = logging.getLogger(__name__)
 
 SERVICE_ACCOUNT_FILE = os.getenv("FIREBASE_SERVICE_ACCOUNT_FILE", "service-account.json")
 
-notification_rates = defaultdict(list)
-MAX_NOTIFICATIONS_PER_MINUTE = 1
+_PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def _parse_rate_limits(spec: str) -> dict:
+    """Parse "default=1/minute,feedback=5/minute" into {type: (count, seconds)}."""
+    limits = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, rate = part.split("=", 1)
+        count, period = rate.strip().split("/", 1)
+        limits[name.strip()] = (int(count), _PERIOD_SECONDS[period.strip()])
+    limits.setdefault("default", (1, 60))
+    return limits
+
+
+class NotificationRateLimiter:
+    """Token bucket per (user, notification type) with bounded memory.
+
+    Each key holds only (tokens, last_seen), so a check is O(1). Keys are
+    kept in LRU order: a bucket idle for a full period has refilled and is
+    indistinguishable from a missing one, so it is dropped, and the oldest
+    keys are evicted once `max_keys` is reached.
+    """
+
+    def __init__(self, limits: dict, max_keys: int = 10000):
+        self.limits = limits
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.allowed = Counter()
+        self.suppressed = Counter()
+
+    def limit_for(self, notification_type: str) -> tuple:
+        return self.limits.get(notification_type, self.limits["default"])
+
+    def _evict_idle(self, now: float) -> None:
+        for _ in range(8):
+            if not self._buckets:
+                return
+            key, (_, last_seen) = next(iter(self._buckets.items()))
+            if now - last_seen < self.limit_for(key[1])[1]:
+                return
+            self._buckets.popitem(last=False)
+
+    def check(self, user_id: int, notification_type: str = "default") -> bool:
+        now = time.monotonic()
+        self._evict_idle(now)
+        capacity, period = self.limit_for(notification_type)
+        key = (user_id, notification_type)
+
+        tokens, last_seen = self._buckets.pop(key, (float(capacity), now))
+        tokens = min(float(capacity), tokens + (now - last_seen) * capacity / period)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+            self.allowed[notification_type] += 1
+        else:
+            self.suppressed[notification_type] += 1
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "allowed": dict(self.allowed),
+            "suppressed": dict(self.suppressed),
+        }
+
+
+notification_limiter = NotificationRateLimiter(
+    _parse_rate_limits(os.getenv("NOTIFICATION_RATE_LIMITS", "default=1/minute")),
+    max_keys=int(os.getenv("NOTIFICATION_RATE_MAX_KEYS", "10000")),
+)
 
 def _ensure_firebase_initialized() -> bool:
+    # firebase_admin is heavy to import, so it is only loaded on first push.
+    import firebase_admin
+    from firebase_admin import credentials
+
     try:
         firebase_admin.get_app()
         return True
@@ -33,22 +111,18 @@ def _ensure_firebase_initialized() -> bool:
             return False
 
 
-def _check_rate_limit(user_id: int) -> bool:
-    now = datetime.now()
-    user_notifications = notification_rates[user_id]
-    
-    user_notifications[:] = [ts for ts in user_notifications if now - ts < timedelta(minutes=1)]
-    
-    # Check if user has exceeded limit
-    if len(user_notifications) >= MAX_NOTIFICATIONS_PER_MINUTE:
-        logger.warning(f"Rate limit exceeded for user {user_id}")
+def _check_rate_limit(user_id: int, notification_type: str = "default") -> bool:
+    if not notification_limiter.check(user_id, notification_type):
+        logger.warning(f"Rate limit exceeded for user {user_id} ({notification_type})")
         return False
-    
-    # Add current notification timestamp
-    user_notifications.append(now)
     return True
 
 
+def _rate_limit_message(notification_type: str) -> str:
+    count, period = notification_limiter.limit_for(notification_type)
+    return f"Rate limit exceeded - max {count} notification(s) per {period} seconds per user"
+
+
 def _verify_digital_signature(signature_data: str, expected_hash: str = None) -> dict:
     try:
         signature_hash = hashlib.sha256(signature_data.encode()).hexdigest()
@@ -80,11 +154,11 @@ async def send_firebase_notification(
     body: str,
     user_id: int = None,
 ) -> dict:
-    if user_id and not _check_rate_limit(user_id):
+    if user_id and not _check_rate_limit(user_id, "push"):
         return {
             "sent": 0,
             "rate_limited": True,
-            "message": "Rate limit exceeded - max 1 notification per minute per user"
+            "message": _rate_limit_message("push")
         }
     
     if isinstance(tokens, str):
@@ -99,6 +173,8 @@ async def send_firebase_notification(
     if not _ensure_firebase_initialized():
         return {"sent": 0}
 
+    from firebase_admin import messaging
+
     notification = messaging.Notification(title=title, body=body)
     message = messaging.MulticastMessage(notification=notification, tokens=token_list)
 
@@ -123,10 +199,10 @@ async def create_system_notification(
         from app.models.notification import Notification
         
         # Check rate limit
-        if not _check_rate_limit(user_id):
+        if not _check_rate_limit(user_id, notification_type):
             return {
                 "success": False, 
-                "error": "Rate limit exceeded - max 1 notification per minute per user"
+                "error": _rate_limit_message(notification_type)
             }
         
         notification = Notification(
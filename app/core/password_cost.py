@@ -0,0 +1,36 @@
+import os
+import time
+from passlib.hash import bcrypt
+
+# Calibration bounds: the startup calibration picks the highest bcrypt cost
+# whose hash time stays within BCRYPT_TARGET_MS on the current hardware.
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+
+
+def time_bcrypt_hash(rounds: int, samples: int = 3) -> float:
+    """Best-of-`samples` seconds for one bcrypt hash at `rounds`."""
+    hasher = bcrypt.using(rounds=rounds)
+    best = None
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float = BCRYPT_TARGET_MS,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> int:
+    # Each extra round doubles the cost, so one measurement is enough to
+    # extrapolate the highest cost that still fits the target.
+    rounds = min_rounds
+    estimate_ms = time_bcrypt_hash(min_rounds) * 1000
+    while rounds < max_rounds and estimate_ms * 2 <= target_ms:
+        estimate_ms *= 2
+        rounds += 1
+    return rounds
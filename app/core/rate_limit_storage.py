@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from limits.storage import Storage
+
+# Fixed-window counters kept in a WAL-mode SQLite file so every gunicorn
+# worker on the host shares one view of each limit, with no external service.
+# Importing this module registers the "sqlite" scheme with `limits`, e.g.
+# Limiter(storage_uri="sqlite:////var/run/hrms/ratelimit.sqlite").
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expiry REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+_INCR = """
+INSERT INTO rate_limits (key, value, expiry) VALUES (:key, :amount, :expiry)
+ON CONFLICT(key) DO UPDATE SET
+    value = CASE WHEN rate_limits.expiry <= :now THEN :amount ELSE rate_limits.value + :amount END,
+    expiry = CASE WHEN rate_limits.expiry <= :now OR :elastic THEN :expiry ELSE rate_limits.expiry END
+RETURNING value
+"""
+
+
+class SQLiteStorage(Storage):
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        # Same convention as SQLAlchemy: sqlite:////abs/path or sqlite:///rel/path
+        self.path = uri.split(":///", 1)[1] if uri and ":///" in uri else "hrms-ratelimit.sqlite"
+        self.gc_interval = float(options.pop("gc_interval", os.getenv("RATE_LIMIT_GC_SECONDS", "60")))
+        self.busy_timeout_ms = int(options.pop("busy_timeout_ms", 5000))
+        self._local = threading.local()
+        self._next_gc = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread and per process: connections must not be
+        # shared across a gunicorn fork.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _maybe_gc(self, now: float) -> None:
+        if now < self._next_gc:
+            return
+        self._next_gc = now + self.gc_interval
+        self._conn.execute("DELETE FROM rate_limits WHERE expiry <= ?", (now,))
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        now = time.time()
+        self._maybe_gc(now)
+        row = self._conn.execute(_INCR, {
+            "key": key,
+            "amount": amount,
+            "expiry": now + expiry,
+            "now": now,
+            "elastic": int(elastic_expiry),
+        }).fetchone()
+        return row[0]
+
+    def get(self, key: str) -> int:
+        row = self._conn.execute(
+            "SELECT value FROM rate_limits WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> int:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT expiry FROM rate_limits WHERE key = ? AND expiry > ?", (key, now)
+        ).fetchone()
+        return int(row[0]) if row else int(now)
+
+    def check(self) -> bool:
+        try:
+            self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self._conn.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
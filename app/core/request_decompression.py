@@ -0,0 +1,155 @@
+import os
+import zlib
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # optional: only needed to accept Content-Encoding: zstd
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies may only be compressed on bulk write endpoints; elsewhere the header
+# is left alone and the body passed through untouched.
+DECOMPRESS_PATH_PREFIXES = tuple(
+    prefix.strip() for prefix in os.getenv("DECOMPRESS_PATH_PREFIXES", "/sync/").split(",") if prefix.strip()
+)
+# Cap on the decompressed body size, against zip bombs.
+REQUEST_MAX_DECOMPRESSED_BYTES = int(os.getenv("REQUEST_MAX_DECOMPRESSED_BYTES", str(100 * 1024 * 1024)))
+_DECODE_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+# zstd has no output bound per call, so input is fed in slices this small to
+# keep what a single slice can expand to modest before the cap is checked.
+_ZSTD_SLICE_BYTES = 512
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int, multi_member: bool):
+        self._wbits = wbits
+        self._multi_member = multi_member
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def decode(self, data: bytes, limit: int) -> bytes:
+        """Decompress `data`, producing at most `limit` + 1 bytes.
+
+        gzip bodies may be several concatenated members; each one that
+        ends hands its unused_data to a fresh decompressor. Anything after
+        the end of a deflate stream is an error.
+        """
+        output = b""
+        while data and len(output) <= limit:
+            if self._decompressor.eof:
+                if not self._multi_member:
+                    raise zlib.error("trailing data after end of deflate stream")
+                self._decompressor = zlib.decompressobj(self._wbits)
+            output += self._decompressor.decompress(data, limit + 1 - len(output))
+            while self._decompressor.unconsumed_tail and len(output) <= limit:
+                output += self._decompressor.decompress(self._decompressor.unconsumed_tail, limit + 1 - len(output))
+            data = self._decompressor.unused_data if self._decompressor.eof else b""
+        return output
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof
+
+
+class _ZstdDecoder:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decode(self, data: bytes, limit: int) -> bytes:
+        """Like _ZlibDecoder.decode; concatenated zstd frames are decoded one after another."""
+        output = b""
+        while data and len(output) <= limit:
+            if self._decompressor.eof:
+                self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+            chunk, data = data[:_ZSTD_SLICE_BYTES], data[_ZSTD_SLICE_BYTES:]
+            output += self._decompressor.decompress(chunk)
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data + data
+        return output
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof
+
+
+def _decoder_for(encoding: str):
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS, multi_member=True)
+    if encoding == "deflate":
+        return _ZlibDecoder(zlib.MAX_WBITS, multi_member=False)
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    return None
+
+
+class RequestDecompressionMiddleware:
+    """Pure ASGI middleware inflating Content-Encoding request bodies as they stream in.
+
+    The body is never buffered whole: each http.request message is inflated
+    on the way to the app, and the app gets a 413 once the inflated size
+    passes `max_bytes`.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: Iterable[str] = DECOMPRESS_PATH_PREFIXES,
+                 max_bytes: int = REQUEST_MAX_DECOMPRESSED_BYTES):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.max_bytes = max_bytes
+
+    def _encoding(self, scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"content-encoding":
+                return value.decode("latin-1").strip().lower()
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(scope)
+        if encoding in (None, "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        decoder = _decoder_for(encoding)
+        if decoder is None:
+            response = JSONResponse(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                content={"detail": f"Unsupported Content-Encoding: {encoding}"},
+            )
+            await response(scope, receive, send)
+            return
+
+        # The app sees a plain body of unknown length.
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        inflated = 0
+
+        async def receive_inflated() -> Message:
+            nonlocal inflated
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                body = decoder.decode(message.get("body", b""), self.max_bytes - inflated)
+            except _DECODE_ERRORS:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed {encoding} request body")
+            inflated += len(body)
+            if inflated > self.max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                    detail=f"Decompressed request body exceeds {self.max_bytes} bytes",
+                )
+            # A stream cut short inflates cleanly up to the cut; only the
+            # missing end-of-stream marker gives it away.
+            if not message.get("more_body", False) and not decoder.eof:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Truncated {encoding} request body")
+            return {**message, "body": body}
+
+        await self.app(scope, receive_inflated, send)
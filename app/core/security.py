@@ -1,52 +1,103 @@
-from fastapi import FastAPI, Request, HTTPException, status
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-import time
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import hmac
 import os
+import tempfile
 from typing import List
+# Imported for its side effect: registers the sqlite:// limits storage.
+from app.core import rate_limit_storage  # noqa: F401
 
-limiter = Limiter(key_func=get_remote_address)
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        return response
-
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, api_key: str = None):
-        super().__init__(app)
-        self.api_key = api_key or os.getenv("API_KEY")
-    
-    async def dispatch(self, request: Request, call_next):
-        public_paths = ["/", "/docs", "/redoc", "/openapi.json", "/login", "/register", "/health"]
-        
-        if request.url.path in public_paths:
-            return await call_next(request)
-        api_key_header = request.headers.get("X-API-Key")
-        if api_key_header and api_key_header == self.api_key:
-            return await call_next(request)
-        
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            return await call_next(request)
-        
-        raise HTTPException(
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Shared by all workers that can see the same file, so limits hold across
+# gunicorn processes. The temp-dir default is for development only: temp
+# dirs are per container (or private under systemd), which would silently
+# give every instance its own counters, so production must name a path on
+# storage all workers share.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI")
+if not RATE_LIMIT_STORAGE_URI:
+    if ENVIRONMENT != "development":
+        raise RuntimeError("RATE_LIMIT_STORAGE_URI must be set outside development, e.g. sqlite:////var/lib/hrms/ratelimit.sqlite")
+    RATE_LIMIT_STORAGE_URI = "sqlite:///" + os.path.join(tempfile.gettempdir(), "hrms-ratelimit.sqlite")
+
+# Fixed window: `limits` has no token bucket, and the SQLite storage only
+# implements counters, not the moving-window strategy.
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI, strategy="fixed-window")
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+}
+
+PUBLIC_PATHS = frozenset(["/", "/docs", "/redoc", "/openapi.json", "/login", "/register", "/health"])
+
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware; headers are encoded once instead of per request."""
+
+    def __init__(self, app: ASGIApp, headers: dict = None):
+        self.app = app
+        self.encoded_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or SECURITY_HEADERS).items()
+        ]
+        self.header_names = {name for name, _ in self.encoded_headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in self.header_names
+                ]
+                headers.extend(self.encoded_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+class APIKeyMiddleware:
+    """Pure ASGI middleware requiring an API key or bearer token off public paths."""
+
+    def __init__(self, app: ASGIApp, api_key: str = None, public_paths: frozenset = PUBLIC_PATHS):
+        self.app = app
+        api_key = api_key or os.getenv("API_KEY")
+        self.api_key = api_key.encode("latin-1") if api_key else None
+        self.public_paths = public_paths
+
+    def _is_authorized(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                if self.api_key and hmac.compare_digest(value, self.api_key):
+                    return True
+            elif name == b"authorization":
+                if value.startswith(b"Bearer "):
+                    return True
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.public_paths or self._is_authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing API key or JWT token"
+            content={"detail": "Invalid or missing API key or JWT token"},
         )
+        await response(scope, receive, send)
 
 def setup_security_middleware(app: FastAPI):
     app.state.limiter = limiter
@@ -0,0 +1,105 @@
+from typing import List, Tuple
+from sqlalchemy import func, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.sync_change import SyncChange
+from app.models.task import Task
+from app.models.leave import Leave
+from app.models.notification import Notification
+from app.models.feedback import Feedback
+from app.models.evaluation import Evaluation
+
+# Tables offered by /sync/changes and the columns naming the users who see a
+# row. Must match the trigger arguments in the sync_changes_triggers migration.
+SYNC_PULL_TABLES = {
+    "tasks": (Task, ("assigned_to_id",)),
+    "leaves": (Leave, ("user_id",)),
+    "notifications": (Notification, ("user_id",)),
+    "feedbacks": (Feedback, ("intern_id", "pm_id")),
+    "evaluations": (Evaluation, ("intern_id", "evaluator_id")),
+}
+
+
+def _row_data(model, row) -> dict:
+    return {column.key: getattr(row, column.key) for column in model.__table__.columns}
+
+
+async def cursor_expired(db: AsyncSession, cursor: int) -> bool:
+    """Whether entries after `cursor` may already have been pruned from the log.
+
+    Compaction deletes the oldest entries (see SYNC_RETENTION_CHANGES_DAYS),
+    so a cursor older than the oldest remaining entry could skip tombstones;
+    such clients have to download everything again from cursor 0.
+    """
+    if cursor <= 0:
+        return False
+    oldest = (await db.execute(select(func.min(SyncChange.id)))).scalar()
+    return oldest is None or oldest > cursor + 1
+
+
+async def fetch_changes(db: AsyncSession, user_id: int, cursor: int, limit: int) -> Tuple[List[dict], int, bool]:
+    """Return (changes, next_cursor, has_more) for a user after `cursor`.
+
+    The cursor is the sync_changes id. Log ids are assigned before commit,
+    so the page stops at the first entry whose transaction may still be
+    in flight (txid at or above the snapshot xmin); otherwise a slow writer's
+    change could land behind a cursor the client already advanced past.
+
+    The snapshot xmin is cluster-wide: while any long transaction runs (a
+    migration, compaction, a big report) entries written after it started
+    are held back for every user. Such a page ends with has_more=False,
+    possibly empty with the cursor unchanged, so clients stop paging and
+    pick the held-back entries up on their next pull instead of spinning on
+    empty pages.
+    """
+    horizon = (await db.execute(text("SELECT txid_snapshot_xmin(txid_current_snapshot())"))).scalar()
+    result = await db.execute(
+        select(SyncChange.id, SyncChange.table_name, SyncChange.record_id, SyncChange.operation, SyncChange.txid)
+        .where(SyncChange.user_id == user_id, SyncChange.id > cursor)
+        .order_by(SyncChange.id)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > limit
+    page = []
+    for row in rows[:limit]:
+        if row.txid >= horizon:
+            has_more = False
+            break
+        page.append(row)
+    if not page:
+        return [], cursor, has_more
+
+    # Only the newest entry per record matters within a page.
+    latest = {}
+    for row in page:
+        latest.pop((row.table_name, row.record_id), None)
+        latest[(row.table_name, row.record_id)] = row.operation
+
+    wanted = {}
+    for (table_name, record_id), operation in latest.items():
+        if operation == "upsert" and table_name in SYNC_PULL_TABLES:
+            wanted.setdefault(table_name, []).append(record_id)
+    current = {}
+    for table_name, ids in wanted.items():
+        model, audience = SYNC_PULL_TABLES[table_name]
+        rows = await db.execute(
+            select(model).where(
+                model.id.in_(ids),
+                or_(*(getattr(model, column) == user_id for column in audience)),
+            )
+        )
+        for row in rows.scalars().all():
+            current[(table_name, row.id)] = _row_data(model, row)
+
+    changes = []
+    for key, operation in latest.items():
+        data = current.get(key) if operation == "upsert" else None
+        # A row that vanished or left the user's audience is reported as a tombstone.
+        changes.append({
+            "table_name": key[0],
+            "record_id": key[1],
+            "operation": "upsert" if data is not None else "delete",
+            "data": data,
+        })
+    return changes, page[-1].id, has_more
@@ -0,0 +1,478 @@
+from typing import List, Optional, Tuple
+from collections import defaultdict
+from itertools import groupby
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+from sqlalchemy import insert, and_, func, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from fastapi import HTTPException, status
+from app.core.cache import TTLCache
+from app.core.sync_handlers import get_sync_handler
+from app.models.role import Role
+from app.models.sync_queue import SyncQueue
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Per-user /sync/queue_status payloads. Entries are dropped whenever this
+# process changes the user's queue rows; the TTL bounds staleness from
+# changes made by other processes.
+sync_status_cache = TTLCache(
+    maxsize=int(os.getenv("SYNC_STATUS_CACHE_MAX_SIZE", "4096")),
+    ttl=float(os.getenv("SYNC_STATUS_CACHE_TTL_SECONDS", "5")),
+)
+
+
+def invalidate_sync_status(user_id: int) -> None:
+    sync_status_cache.invalidate(user_id)
+
+# Failed items are retried with exponential backoff and dead-lettered
+# ("dead" status) once they have failed SYNC_MAX_RETRIES times.
+SYNC_MAX_RETRIES = int(os.getenv("SYNC_MAX_RETRIES", "5"))
+SYNC_RETRY_BASE_SECONDS = float(os.getenv("SYNC_RETRY_BASE_SECONDS", "30"))
+SYNC_RETRY_MAX_SECONDS = float(os.getenv("SYNC_RETRY_MAX_SECONDS", "3600"))
+SYNC_RETRY_CHUNK_SIZE = int(os.getenv("SYNC_RETRY_CHUNK_SIZE", "100"))
+
+
+def retry_delay(retry_count: int) -> timedelta:
+    """Wait before the next attempt after `retry_count` failures: base * 2**(n-1), capped."""
+    seconds = SYNC_RETRY_BASE_SECONDS * 2 ** max(retry_count - 1, 0)
+    return timedelta(seconds=min(seconds, SYNC_RETRY_MAX_SECONDS))
+
+
+def failure_fields(retry_count: int, message: str, now: datetime, retryable: bool = True) -> dict:
+    retry_count = (retry_count or 0) + 1
+    # Items that fail validation will fail the same way again; dead-letter them at once.
+    dead = not retryable or retry_count >= SYNC_MAX_RETRIES
+    return {
+        "status": "dead" if dead else "failed",
+        "error_message": message,
+        "retry_count": retry_count,
+        "next_attempt_at": None if dead else now + retry_delay(retry_count),
+    }
+
+
+# First key of pg_try_advisory_xact_lock(key, user_id): one lane per user, so a
+# user's queue is applied in order while different users run in parallel.
+SYNC_LANE_LOCK_KEY = 7_202_612
+
+
+async def try_lock_lane(db: AsyncSession, user_id: int) -> bool:
+    """Take the user's lane for the rest of the current transaction, if nobody holds it."""
+    locked = await db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key, :user_id)"),
+        {"key": SYNC_LANE_LOCK_KEY, "user_id": user_id},
+    )
+    return bool(locked.scalar())
+
+
+def due_for_processing(now: datetime):
+    """Rows a worker may pick up: new items plus failed items whose backoff has elapsed."""
+    return or_(
+        SyncQueue.status == "pending",
+        and_(SyncQueue.status == "failed", SyncQueue.next_attempt_at <= now),
+    )
+
+
+def is_due(queue_item: SyncQueue, now: datetime) -> bool:
+    """Python-side counterpart of due_for_processing for an already loaded row."""
+    if queue_item.status == "pending":
+        return True
+    return queue_item.status == "failed" and queue_item.next_attempt_at is not None and queue_item.next_attempt_at <= now
+
+
+async def skip_superseded(db: AsyncSession, user_id: int, queue_items: List[SyncQueue]) -> List[SyncQueue]:
+    """Complete failed updates/deletes a later completed op on the same record already overtook.
+
+    Replaying them would put older data back over newer data, e.g. after a
+    sync-mode upload succeeded while the failed row was backing off.
+    Returns the rows that still have to be applied.
+    """
+    stale = [
+        item for item in queue_items
+        if item.status == "failed" and item.operation_type in ("update", "delete") and item.record_id
+    ]
+    if not stale:
+        return queue_items
+    result = await db.execute(
+        select(SyncQueue.table_name, SyncQueue.record_id, func.max(SyncQueue.id))
+        .where(
+            SyncQueue.user_id == user_id,
+            SyncQueue.status == "completed",
+            SyncQueue.operation_type.in_(["update", "delete"]),
+            SyncQueue.record_id.in_({item.record_id for item in stale}),
+        )
+        .group_by(SyncQueue.table_name, SyncQueue.record_id)
+    )
+    latest = {(table_name, record_id): last_id for table_name, record_id, last_id in result.all()}
+    now = datetime.now(timezone.utc)
+    superseded = set()
+    for item in stale:
+        if latest.get((item.table_name, item.record_id), 0) > item.id:
+            item.status = "completed"
+            item.synced_at = now
+            item.error_message = "Superseded by a later operation on the same record"
+            item.next_attempt_at = None
+            superseded.add(item.id)
+    return [item for item in queue_items if item.id not in superseded]
+
+
+SYNC_OPERATIONS = ("create", "update", "delete")
+
+
+def _check_item(item, user_id: int) -> Tuple[Optional[str], Optional[dict]]:
+    """Validate an item without touching the database; returns (error, values)."""
+    handler = get_sync_handler(item.table_name)
+    if handler is None:
+        return f"Unsupported table: {item.table_name}", None
+    if item.operation_type not in SYNC_OPERATIONS:
+        return f"Unsupported operation type: {item.operation_type}", None
+    if item.operation_type != "create" and not item.record_id and not item.record_temp_id:
+        return f"Record ID required for {item.operation_type} operation", None
+    return handler.validate(item.operation_type, item.data, user_id)
+
+
+async def _resolve_temp_ids(db: AsyncSession, user_id: int, items, record_ids, temp_ids: dict, pending: List[int]) -> List[int]:
+    """Fill record_ids for items that reference a create by client temp ID.
+
+    Temp IDs created earlier in this batch come from `temp_ids`; older ones
+    from the user's latest completed create row in sync_queue (one lookup).
+    Returns the indexes that could not be resolved.
+    """
+    missing = {
+        (items[i].table_name, items[i].record_temp_id)
+        for i in pending if (items[i].table_name, items[i].record_temp_id) not in temp_ids
+    }
+    if missing:
+        result = await db.execute(
+            select(SyncQueue.table_name, SyncQueue.client_temp_id, SyncQueue.record_id).where(
+                SyncQueue.user_id == user_id,
+                SyncQueue.operation_type == "create",
+                SyncQueue.status == "completed",
+                SyncQueue.client_temp_id.in_({temp_id for _, temp_id in missing}),
+            )
+            # Clients may reuse temp IDs across sessions; the newest create wins.
+            .order_by(SyncQueue.id)
+        )
+        for table_name, temp_id, record_id in result.all():
+            if (table_name, temp_id) in missing and record_id:
+                temp_ids[(table_name, temp_id)] = record_id
+
+    unresolved = []
+    for index in pending:
+        record_id = temp_ids.get((items[index].table_name, items[index].record_temp_id))
+        if record_id is None:
+            unresolved.append(index)
+        else:
+            record_ids[index] = record_id
+    return unresolved
+
+
+async def _role_name(db: AsyncSession, user_id: int) -> Optional[str]:
+    result = await db.execute(select(Role.name).join(User, User.role_id == Role.id).where(User.id == user_id))
+    name = result.scalar_one_or_none()
+    return name.lower() if name else None
+
+
+async def apply_items(db: AsyncSession, user_id: int, items) -> List[dict]:
+    """Apply sync items (SyncQueueItem or SyncQueue rows) and return one result per item.
+
+    Every item is validated by its table's handler before any database work.
+    Work is then grouped per table: one INSERT ... RETURNING for the creates, one
+    executemany UPDATE for the updates and one DELETE for the deletes, after
+    a single ownership and state lookup covering every record the batch touches.
+    Creates run first for every table, so later items can address a new
+    record through its client temp ID.
+    """
+    results: List[Optional[dict]] = [None] * len(items)
+    record_ids = [item.record_id for item in items]
+    values: List[Optional[dict]] = [None] * len(items)
+    temp_ids = {}
+    groups = defaultdict(lambda: defaultdict(list))
+
+    def fail(index, message, retryable=True):
+        results[index] = {"success": False, "record_id": record_ids[index], "message": message, "retryable": retryable}
+
+    def succeed(index, message):
+        results[index] = {"success": True, "record_id": record_ids[index], "message": message}
+
+    for index, item in enumerate(items):
+        error, values[index] = _check_item(item, user_id)
+        if error:
+            fail(index, error, retryable=False)
+        else:
+            groups[item.table_name][item.operation_type].append(index)
+
+    role = None
+    for table_name, operations in groups.items():
+        creates = operations["create"]
+        if not creates:
+            continue
+        handler = get_sync_handler(table_name)
+        if handler.create_roles is not None:
+            if role is None:
+                role = await _role_name(db, user_id) or ""
+            if role not in handler.create_roles:
+                for index in creates:
+                    fail(index, f"Insufficient permissions to create {handler.name}", retryable=False)
+                continue
+        ids, errors = await handler.insert(db, [values[i] for i in creates])
+        for index, record_id, error in zip(creates, ids, errors):
+            if error:
+                logger.error(f"Error processing {table_name} sync: {error}")
+                fail(index, f"Error processing {table_name} sync: {error}")
+                continue
+            record_ids[index] = record_id
+            if items[index].client_temp_id:
+                temp_ids[(table_name, items[index].client_temp_id)] = record_id
+            succeed(index, f"{handler.name} created successfully")
+
+    pending = [
+        index for index, item in enumerate(items)
+        if results[index] is None and item.operation_type != "create" and not item.record_id
+    ]
+    if pending:
+        for index in await _resolve_temp_ids(db, user_id, items, record_ids, temp_ids, pending):
+            fail(index, f"Unknown temp ID: {items[index].record_temp_id}", retryable=False)
+
+    for table_name, operations in groups.items():
+        handler = get_sync_handler(table_name)
+        name = handler.name
+        touched = [i for i in operations["update"] + operations["delete"] if results[i] is None]
+        if not touched:
+            continue
+        owned = await handler.owned_ids(db, user_id, {record_ids[i] for i in touched})
+        for index in touched:
+            if record_ids[index] not in owned:
+                # Ownership and row state will not change by retrying.
+                fail(index, f"{name} {record_ids[index]} not found, not owned by user or no longer editable", retryable=False)
+
+        # An update queued after a delete of the same record cannot apply.
+        deleted_at = {}
+        for index in operations["delete"]:
+            deleted_at.setdefault(record_ids[index], index)
+        updates = []
+        for index in operations["update"]:
+            if results[index] is not None:
+                continue
+            if deleted_at.get(record_ids[index], len(items)) < index:
+                fail(index, f"{name} {record_ids[index]} was deleted earlier in this batch", retryable=False)
+            else:
+                updates.append(index)
+        if updates:
+            rows = [{**values[i], "id": record_ids[i]} for i in updates]
+            errors = await handler.update(db, rows)
+            for index, error in zip(updates, errors):
+                if error:
+                    logger.error(f"Error processing {table_name} sync: {error}")
+                    fail(index, f"Error processing {table_name} sync: {error}")
+                else:
+                    succeed(index, f"{name} updated successfully")
+
+        deletes = [i for i in operations["delete"] if results[i] is None]
+        first_deletes = [i for i in deletes if deleted_at[record_ids[i]] == i]
+        if first_deletes:
+            errors = await handler.delete(db, [record_ids[i] for i in first_deletes])
+            for index, error in zip(first_deletes, errors):
+                if error:
+                    logger.error(f"Error processing {table_name} sync: {error}")
+                    fail(index, f"Error processing {table_name} sync: {error}")
+                else:
+                    succeed(index, f"{name} deleted successfully")
+        for index in deletes:
+            if results[index] is None:
+                fail(index, f"{name} {record_ids[index]} was deleted earlier in this batch", retryable=False)
+
+    return results
+
+
+def record_result(queue_item: SyncQueue, result: dict) -> None:
+    now = datetime.now(timezone.utc)
+    if result["success"]:
+        queue_item.record_id = result["record_id"]
+        queue_item.status = "completed"
+        queue_item.synced_at = now
+        queue_item.error_message = None
+        queue_item.next_attempt_at = None
+    else:
+        for key, value in failure_fields(queue_item.retry_count, result["message"], now, result.get("retryable", True)).items():
+            setattr(queue_item, key, value)
+
+
+async def _existing_ops(db: AsyncSession, user_id: int, op_ids) -> dict:
+    result = await db.execute(
+        select(SyncQueue).where(SyncQueue.user_id == user_id, SyncQueue.client_op_id.in_(op_ids))
+    )
+    return {row.client_op_id: row for row in result.scalars().all()}
+
+
+async def _write_with_replays(db: AsyncSession, user_id: int, items, write) -> List[SyncQueue]:
+    """Run write(fresh_items) for items not seen before and splice replays back in.
+
+    Items whose client_op_id already has a queue row are answered with that
+    row (one batched lookup) instead of being applied again; repeats inside
+    the same batch share the first occurrence's row. write() returns None
+    for items whose op ID a concurrent request claimed after the lookup; it
+    runs in a savepoint that is then rolled back, those items become
+    replays too, and the rest is written again.
+    """
+    op_ids = {item.client_op_id for item in items if item.client_op_id}
+    existing = await _existing_ops(db, user_id, op_ids) if op_ids else {}
+
+    while True:
+        fresh, first_seen = [], {}
+        for index, item in enumerate(items):
+            op_id = item.client_op_id
+            if op_id and (op_id in existing or op_id in first_seen):
+                continue
+            if op_id:
+                first_seen[op_id] = index
+            fresh.append(index)
+        if not fresh:
+            written = {}
+            break
+        savepoint = await db.begin_nested()
+        rows = await write([items[i] for i in fresh])
+        lost = {items[i].client_op_id for i, row in zip(fresh, rows) if row is None}
+        if not lost:
+            await savepoint.commit()
+            written = dict(zip(fresh, rows))
+            break
+        await savepoint.rollback()
+        existing.update(await _existing_ops(db, user_id, lost))
+
+    queue_items = []
+    for index, item in enumerate(items):
+        if index in written:
+            queue_items.append(written[index])
+        elif item.client_op_id in existing:
+            queue_items.append(existing[item.client_op_id])
+        else:
+            queue_items.append(written[first_seen[item.client_op_id]])
+    return queue_items
+
+
+def _queue_row(user_id: int, item) -> dict:
+    return {
+        "user_id": user_id,
+        "operation_type": item.operation_type,
+        "table_name": item.table_name,
+        "record_id": item.record_id,
+        "data": item.data,
+        "client_op_id": item.client_op_id,
+        "client_temp_id": item.client_temp_id,
+        "record_temp_id": item.record_temp_id,
+    }
+
+
+async def _insert_queue_rows(db: AsyncSession, queue_rows: List[dict]) -> List[Optional[SyncQueue]]:
+    """Insert queue rows in order; rows whose client_op_id is already taken come back as None.
+
+    Rows carrying an op ID go out as INSERT ... ON CONFLICT DO NOTHING, so a
+    concurrent replay waits for the request that got there first and then
+    loses cleanly instead of failing with an IntegrityError. RETURNING skips
+    the conflicting rows, so those are matched back by op ID. Runs of rows
+    with and without op IDs are inserted one after another to keep ids in
+    batch order, which the worker lanes rely on.
+    """
+    inserted: List[Optional[SyncQueue]] = []
+    for keyed, run in groupby(queue_rows, key=lambda row: bool(row["client_op_id"])):
+        run = list(run)
+        if not keyed:
+            result = await db.execute(insert(SyncQueue).returning(SyncQueue, sort_by_parameter_order=True), run)
+            inserted.extend(result.scalars().all())
+            continue
+        statement = (
+            pg_insert(SyncQueue)
+            .on_conflict_do_nothing(index_elements=[SyncQueue.user_id, SyncQueue.client_op_id])
+            .returning(SyncQueue)
+        )
+        result = await db.execute(statement, run)
+        by_op_id = {row.client_op_id: row for row in result.scalars().all()}
+        inserted.extend(by_op_id.get(row["client_op_id"]) for row in run)
+    return inserted
+
+
+async def apply_sync_batch(db: AsyncSession, user_id: int, items) -> List[SyncQueue]:
+    """Apply a batch and record it in sync_queue; the caller commits.
+
+    Domain rows are written with a few statements per table and the queue
+    rows with multi-row INSERT ... RETURNING statements (see
+    _insert_queue_rows), so round trips no longer grow with the batch size.
+    """
+    async def write(fresh):
+        results = await apply_items(db, user_id, fresh)
+        synced_at = datetime.now(timezone.utc)
+        completed = {"status": "completed", "error_message": None, "retry_count": 0, "next_attempt_at": None}
+        return await _insert_queue_rows(db, [
+            {
+                **_queue_row(user_id, item),
+                "record_id": result["record_id"],
+                **(completed if result["success"] else failure_fields(0, result["message"], synced_at, result.get("retryable", True))),
+                "synced_at": synced_at if result["success"] else None,
+            }
+            for item, result in zip(fresh, results)
+        ])
+
+    return await _write_with_replays(db, user_id, items, write)
+
+
+async def enqueue_sync_batch(db: AsyncSession, user_id: int, items) -> List[SyncQueue]:
+    """Record a batch as pending for the background workers; the caller commits.
+
+    Items are validated here so invalid ones are dead-lettered straight away
+    instead of occupying a worker.
+    """
+    async def write(fresh):
+        now = datetime.now(timezone.utc)
+        rows = []
+        for item in fresh:
+            row = {**_queue_row(user_id, item), "status": "pending", "error_message": None, "retry_count": 0, "next_attempt_at": None}
+            error, _ = _check_item(item, user_id)
+            if error:
+                row.update(failure_fields(0, error, now, retryable=False))
+            rows.append(row)
+        return await _insert_queue_rows(db, rows)
+
+    return await _write_with_replays(db, user_id, items, write)
+
+
+async def retry_failed_items(db: AsyncSession, user_id: int) -> List[tuple]:
+    """Reprocess a user's failed items in chunks, one transaction per chunk.
+
+    Returns (queue_id, result) pairs. Dead-lettered items are left alone;
+    backoff is ignored since the user asked for the retry. Each chunk holds
+    the user's lane like a worker does; if a worker has it, 409 is raised
+    and chunks already committed stay applied.
+    """
+    processed = []
+    last_id = 0
+    while True:
+        if not await try_lock_lane(db, user_id):
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Sync queue is being processed, retry shortly")
+        result = await db.execute(
+            select(SyncQueue)
+            .where(
+                SyncQueue.user_id == user_id,
+                SyncQueue.status == "failed",
+                SyncQueue.id > last_id,
+            )
+            .order_by(SyncQueue.id)
+            .limit(SYNC_RETRY_CHUNK_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        chunk = list(result.scalars().all())
+        if not chunk:
+            await db.commit()
+            return processed
+        last_id = chunk[-1].id
+        chunk = await skip_superseded(db, user_id, chunk)
+        results = await apply_items(db, user_id, chunk)
+        for queue_item, item_result in zip(chunk, results):
+            record_result(queue_item, item_result)
+            processed.append((queue_item.id, item_result))
+        await db.commit()
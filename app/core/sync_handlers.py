@@ -0,0 +1,249 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import JSON, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from pydantic import ConfigDict, ValidationError, create_model
+from app.models.evaluation import Evaluation
+from app.models.task import Task
+from app.models.feedback import Feedback
+from app.models.leave import Leave
+from app.models.attendance import Attendance
+
+
+async def _insert_rows(db: AsyncSession, model, rows: List[dict]) -> Tuple[List[Optional[int]], List[Optional[str]]]:
+    """Insert rows for one table; returns (new id or None, error or None) lists.
+
+    The group goes out as one multi-row INSERT ... RETURNING id in parameter
+    order. If it fails, each row is retried in its own savepoint so only the
+    offending rows are reported.
+    """
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    try:
+        async with db.begin_nested():
+            result = await db.execute(statement, rows)
+            ids = list(result.scalars().all())
+        return ids, [None] * len(rows)
+    except Exception as e:
+        if len(rows) == 1:
+            return [None], [str(e)]
+
+    ids, errors = [], []
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                result = await db.execute(statement, [row])
+                ids.append(result.scalar_one())
+            errors.append(None)
+        except Exception as e:
+            ids.append(None)
+            errors.append(str(e))
+    return ids, errors
+
+
+async def _execute_rows(db: AsyncSession, statement, rows: List[dict]) -> List[Optional[str]]:
+    """Run one statement for a group of rows; returns an error message (or None) per row.
+
+    The whole group goes out as one executemany statement. If it fails, each
+    row is retried in its own savepoint so only the offending rows are
+    reported.
+    """
+    try:
+        async with db.begin_nested():
+            await db.execute(statement, rows)
+        return [None] * len(rows)
+    except Exception as e:
+        if len(rows) == 1:
+            return [str(e)]
+
+    errors = []
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                await db.execute(statement, [row])
+            errors.append(None)
+        except Exception as e:
+            errors.append(str(e))
+    return errors
+
+
+async def _delete_rows(db: AsyncSession, model, ids: List[int]) -> List[Optional[str]]:
+    """DELETE ... WHERE id IN (...) with the same per-row fallback as _execute_rows."""
+    try:
+        async with db.begin_nested():
+            await db.execute(delete(model).where(model.id.in_(ids)))
+        return [None] * len(ids)
+    except Exception as e:
+        if len(ids) == 1:
+            return [str(e)]
+
+    errors = []
+    for record_id in ids:
+        try:
+            async with db.begin_nested():
+                await db.execute(delete(model).where(model.id == record_id))
+            errors.append(None)
+        except Exception as e:
+            errors.append(str(e))
+    return errors
+
+
+def _python_type(column):
+    if isinstance(column.type, JSON):
+        return Any
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return Any
+
+
+def _format_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'data'}: {err['msg']}" for err in error.errors()
+    )
+
+
+class SyncHandler:
+    """How one table is written through /sync.
+
+    `columns` is the whitelist clients may set. Create and update payloads
+    are validated against pydantic models compiled once from those columns
+    (extra fields forbidden, NOT NULL columns required on create). Creates
+    are owned by the syncing user: `owner_column` defaults to them and any
+    other value is rejected; it cannot be changed by an update at all. When
+    `create_roles` is set, only users with one of those roles (lowercase
+    names) may create rows. Update and delete require the row's
+    `owner_column` to be the syncing user and
+    every `guards` criterion to hold, so rows that have moved past the
+    client's control (a locked evaluation, a decided leave) stay untouched.
+    The insert/update/delete methods are the set-based executors; override
+    them for tables that need different write logic.
+    """
+
+    def __init__(self, table_name: str, model, columns: Iterable[str], owner_column: str,
+                 guards: Iterable = (), create_roles: Optional[Iterable[str]] = None):
+        self.table_name = table_name
+        self.model = model
+        self.name = model.__name__
+        self.columns = tuple(columns)
+        self.owner_column = owner_column
+        self.guards = tuple(guards)
+        self.create_roles = frozenset(create_roles) if create_roles is not None else None
+        self.create_schema = self._compile_schema(for_create=True)
+        self.update_schema = self._compile_schema(for_create=False)
+
+    def _compile_schema(self, for_create: bool) -> type:
+        fields = {}
+        for name in self.columns:
+            column = self.model.__table__.columns[name]
+            python_type = _python_type(column)
+            if name == self.owner_column:
+                if for_create:
+                    fields[name] = (Optional[python_type], None)
+                continue
+            required = for_create and not column.nullable and column.default is None and column.server_default is None
+            if required:
+                fields[name] = (python_type, ...)
+            elif column.nullable:
+                fields[name] = (Optional[python_type], None)
+            else:
+                # May be omitted, but an explicit null is rejected.
+                fields[name] = (python_type, None)
+        suffix = "Create" if for_create else "Update"
+        return create_model(
+            f"{self.name}Sync{suffix}",
+            __config__=ConfigDict(extra="forbid"),
+            **fields,
+        )
+
+    def validate(self, operation_type: str, data: Dict[str, Any], user_id: int) -> Tuple[Optional[str], Optional[dict]]:
+        """Return (error, values); values only contain the fields the client sent.
+
+        Create values always carry `owner_column`, filled in with `user_id`
+        when the client left it out.
+        """
+        if operation_type == "delete":
+            return None, {}
+        schema = self.create_schema if operation_type == "create" else self.update_schema
+        try:
+            values = schema.model_validate(data).model_dump(exclude_unset=True)
+        except ValidationError as e:
+            return f"Invalid {self.name} data: {_format_errors(e)}", None
+        if operation_type == "create":
+            owner = values.get(self.owner_column)
+            if owner is not None and owner != user_id:
+                return f"{self.owner_column} must be the syncing user", None
+            values[self.owner_column] = user_id
+        if operation_type == "update" and not values:
+            return "No fields to update", None
+        return None, values
+
+    async def owned_ids(self, db: AsyncSession, user_id: int, ids) -> set:
+        """Ids among `ids` the user may still update or delete.
+
+        The rows are locked until the caller's transaction ends, so a
+        concurrent approval or lock cannot land between this check and the
+        write that relies on it.
+        """
+        owner = getattr(self.model, self.owner_column)
+        result = await db.execute(
+            select(self.model.id)
+            .where(self.model.id.in_(ids), owner == user_id, *self.guards)
+            .order_by(self.model.id)
+            .with_for_update()
+        )
+        return set(result.scalars().all())
+
+    async def insert(self, db: AsyncSession, rows: List[dict]) -> Tuple[List[Optional[int]], List[Optional[str]]]:
+        return await _insert_rows(db, self.model, rows)
+
+    async def update(self, db: AsyncSession, rows: List[dict]) -> List[Optional[str]]:
+        return await _execute_rows(db, update(self.model), rows)
+
+    async def delete(self, db: AsyncSession, ids: List[int]) -> List[Optional[str]]:
+        return await _delete_rows(db, self.model, ids)
+
+
+# Tables the mobile app may write through /sync, keyed by the table_name it sends.
+SYNC_HANDLERS: Dict[str, SyncHandler] = {}
+
+
+def register_sync_handler(handler: SyncHandler) -> SyncHandler:
+    SYNC_HANDLERS[handler.table_name] = handler
+    return handler
+
+
+def get_sync_handler(table_name: str) -> Optional[SyncHandler]:
+    return SYNC_HANDLERS.get(table_name)
+
+
+register_sync_handler(SyncHandler(
+    "evaluations", Evaluation,
+    ["evaluator_id", "intern_id", "project_id", "stars", "comment", "criteria"],
+    owner_column="evaluator_id",
+    create_roles={"pm", "manager", "admin"},
+    # Locked evaluations feed submit_verdict and must not change underneath it.
+    guards=[Evaluation.lock_status.is_(False)],
+))
+register_sync_handler(SyncHandler(
+    "tasks", Task,
+    ["project_id", "title", "description", "status", "assigned_to_id", "progress", "due_date"],
+    owner_column="assigned_to_id",
+))
+register_sync_handler(SyncHandler(
+    "feedbacks", Feedback,
+    ["project_id", "intern_id", "pm_id", "feedback_text", "rating"],
+    owner_column="pm_id",
+    create_roles={"pm", "manager", "admin"},
+))
+register_sync_handler(SyncHandler(
+    "leaves", Leave,
+    ["user_id", "start_date", "end_date", "reason"],
+    owner_column="user_id",
+    # Once HR has approved or rejected a leave the requester can no longer edit it.
+    guards=[Leave.status == "pending"],
+))
+register_sync_handler(SyncHandler(
+    "attendance", Attendance,
+    ["user_id", "date", "present"],
+    owner_column="user_id",
+))
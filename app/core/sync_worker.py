@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.future import select
+
+from app.core.database import SessionLocal
+from app.core.sync_engine import (
+    apply_items, due_for_processing, failure_fields, invalidate_sync_status, is_due, record_result, skip_superseded,
+    sync_status_cache, try_lock_lane,
+)
+from app.models.sync_change import SyncChange
+from app.models.sync_queue import SyncQueue
+
+logger = logging.getLogger(__name__)
+
+# Workers and compaction start only where SYNC_BACKGROUND_TASKS is "true":
+# set it on one process per deployment (or a dedicated worker process), not
+# on every gunicorn worker. Elsewhere async uploads just wait in the queue.
+SYNC_BACKGROUND_TASKS = os.getenv("SYNC_BACKGROUND_TASKS", "false").lower() == "true"
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "2"))
+SYNC_WORKER_BATCH_SIZE = int(os.getenv("SYNC_WORKER_BATCH_SIZE", "200"))
+SYNC_WORKER_POLL_SECONDS = float(os.getenv("SYNC_WORKER_POLL_SECONDS", "2"))
+# How many users with pending work a worker considers per pass.
+SYNC_LANE_CANDIDATES = 20
+
+# Retention for finished rows; compaction deletes them in bounded batches so
+# it never holds many row locks or a long transaction.
+SYNC_RETENTION_COMPLETED_DAYS = float(os.getenv("SYNC_RETENTION_COMPLETED_DAYS", "7"))
+SYNC_RETENTION_FAILED_DAYS = float(os.getenv("SYNC_RETENTION_FAILED_DAYS", "30"))
+# Rows carrying a client_op_id or client_temp_id back replay detection and
+# temp-ID resolution, so they are kept at least this long whatever their status.
+SYNC_RETENTION_CLIENT_IDS_DAYS = float(os.getenv("SYNC_RETENTION_CLIENT_IDS_DAYS", "90"))
+# The /sync/changes log is pruned past this age; older cursors get a 410.
+SYNC_RETENTION_CHANGES_DAYS = float(os.getenv("SYNC_RETENTION_CHANGES_DAYS", "90"))
+SYNC_COMPACTION_BATCH_SIZE = int(os.getenv("SYNC_COMPACTION_BATCH_SIZE", "1000"))
+SYNC_COMPACTION_INTERVAL_SECONDS = float(os.getenv("SYNC_COMPACTION_INTERVAL_SECONDS", "3600"))
+
+
+OPEN_STATUSES = ["pending", "failed"]
+
+
+async def _claim_lane(db) -> Optional[int]:
+    """Lock the user with the oldest due work that no other worker holds.
+
+    Only users whose oldest open row is due qualify: a row waiting out its
+    backoff holds back everything queued after it.
+    """
+    result = await db.execute(
+        select(SyncQueue.user_id)
+        .where(SyncQueue.status.in_(OPEN_STATUSES))
+        .group_by(SyncQueue.user_id)
+        .having(func.min(SyncQueue.id) == func.min(SyncQueue.id).filter(due_for_processing(datetime.now(timezone.utc))))
+        .order_by(func.min(SyncQueue.id))
+        .limit(SYNC_LANE_CANDIDATES)
+    )
+    for user_id in result.scalars().all():
+        if await try_lock_lane(db, user_id):
+            return user_id
+    return None
+
+
+async def process_next_lane() -> int:
+    """Apply one batch of a user's due items; returns how many were processed.
+
+    The batch is the user's open rows in id order, cut at the first one
+    still backing off, so a lane never runs ahead of an earlier op. The lane
+    lock, the row locks (FOR UPDATE SKIP LOCKED) and the status updates all
+    live in one transaction, so a crashed worker simply leaves its rows due
+    for the next one.
+    """
+    async with SessionLocal() as db:
+        user_id = await _claim_lane(db)
+        if user_id is None:
+            await db.rollback()
+            return 0
+        result = await db.execute(
+            select(SyncQueue)
+            .where(SyncQueue.user_id == user_id, SyncQueue.status.in_(OPEN_STATUSES))
+            .order_by(SyncQueue.id)
+            .limit(SYNC_WORKER_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        now = datetime.now(timezone.utc)
+        queue_items: List[SyncQueue] = []
+        for queue_item in result.scalars().all():
+            if not is_due(queue_item, now):
+                break
+            queue_items.append(queue_item)
+        if not queue_items:
+            await db.rollback()
+            return 0
+        ids = [item.id for item in queue_items]
+        # Read before apply_items: rolling back the savepoint expires the loaded rows.
+        ids_by_retry_count = defaultdict(list)
+        for queue_item in queue_items:
+            ids_by_retry_count[queue_item.retry_count or 0].append(queue_item.id)
+        try:
+            # A savepoint rather than a rollback on failure: the transaction,
+            # and with it the lane lock, must outlive the failure bookkeeping.
+            async with db.begin_nested():
+                queue_items = await skip_superseded(db, user_id, queue_items)
+                results = await apply_items(db, user_id, queue_items)
+                for queue_item, item_result in zip(queue_items, results):
+                    record_result(queue_item, item_result)
+                await db.flush()
+        except Exception as e:
+            logger.error(f"Sync worker failed on lane {user_id}: {e}")
+            # Count the attempt so a poison batch backs off exponentially and is
+            # eventually dead-lettered; one UPDATE per distinct retry_count.
+            now = datetime.now(timezone.utc)
+            for retry_count, retry_ids in ids_by_retry_count.items():
+                await db.execute(
+                    update(SyncQueue)
+                    .where(SyncQueue.id.in_(retry_ids), SyncQueue.status.in_(OPEN_STATUSES))
+                    .values(**failure_fields(retry_count, str(e), now))
+                )
+        await db.commit()
+        invalidate_sync_status(user_id)
+        return len(ids)
+
+
+async def compact_sync_queue(batch_size: int = SYNC_COMPACTION_BATCH_SIZE) -> int:
+    """Delete finished rows past their retention window; returns how many were removed."""
+    now = datetime.now(timezone.utc)
+    has_client_ids = or_(SyncQueue.client_op_id.isnot(None), SyncQueue.client_temp_id.isnot(None))
+    policies = []
+    for statuses, days in ((["completed"], SYNC_RETENTION_COMPLETED_DAYS), (["failed", "dead"], SYNC_RETENTION_FAILED_DAYS)):
+        policies.append((statuses, ~has_client_ids, now - timedelta(days=days)))
+        policies.append((statuses, has_client_ids, now - timedelta(days=max(days, SYNC_RETENTION_CLIENT_IDS_DAYS))))
+    removed = 0
+    for statuses, scope, cutoff in policies:
+        while True:
+            batch = (
+                select(SyncQueue.id)
+                .where(SyncQueue.status.in_(statuses), scope, SyncQueue.created_at < cutoff)
+                .order_by(SyncQueue.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    delete(SyncQueue)
+                    .where(SyncQueue.id.in_(batch.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            removed += result.rowcount
+            if result.rowcount < batch_size:
+                break
+            await asyncio.sleep(0)
+    if removed:
+        sync_status_cache.clear()
+        logger.info(f"Compacted sync_queue: removed {removed} rows")
+    return removed
+
+
+async def compact_sync_changes(batch_size: int = SYNC_COMPACTION_BATCH_SIZE) -> int:
+    """Delete sync_changes entries past SYNC_RETENTION_CHANGES_DAYS, oldest ids first."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=SYNC_RETENTION_CHANGES_DAYS)
+    removed = 0
+    while True:
+        batch = (
+            select(SyncChange.id)
+            .where(SyncChange.changed_at < cutoff)
+            .order_by(SyncChange.id)
+            .limit(batch_size)
+        )
+        async with SessionLocal() as db:
+            result = await db.execute(
+                delete(SyncChange)
+                .where(SyncChange.id.in_(batch.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            break
+        await asyncio.sleep(0)
+    if removed:
+        logger.info(f"Compacted sync_changes: removed {removed} rows")
+    return removed
+
+
+class SyncWorkerPool:
+    """Background tasks draining pending (and due failed) sync_queue rows."""
+
+    def __init__(self, workers: int = SYNC_WORKERS, poll_seconds: float = SYNC_WORKER_POLL_SECONDS):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._processed = 0
+        self._compacted = 0
+        self._changes_pruned = 0
+
+    def start(self) -> None:
+        if self._tasks or not SYNC_BACKGROUND_TASKS:
+            return
+        self._tasks = [asyncio.create_task(self._run(n)) for n in range(self.workers)]
+        if SYNC_COMPACTION_INTERVAL_SECONDS > 0:
+            self._tasks.append(asyncio.create_task(self._compact()))
+        logger.info(f"Started {self.workers} sync workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after new rows were enqueued."""
+        self._wakeup.set()
+
+    async def _run(self, worker: int) -> None:
+        while True:
+            try:
+                processed = await process_next_lane()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sync worker {worker} error: {e}")
+                processed = 0
+            self._processed += processed
+            if processed:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _compact(self) -> None:
+        while True:
+            try:
+                self._compacted += await compact_sync_queue()
+                self._changes_pruned += await compact_sync_changes()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sync queue compaction error: {e}")
+            await asyncio.sleep(SYNC_COMPACTION_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "background_tasks": SYNC_BACKGROUND_TASKS,
+            "workers": self.workers if self._tasks else 0,
+            "processed": self._processed,
+            "compacted": self._compacted,
+            "changes_pruned": self._changes_pruned,
+            "batch_size": SYNC_WORKER_BATCH_SIZE,
+        }
+
+
+sync_workers = SyncWorkerPool()
@@ -1,10 +1,13 @@
 import asyncio
 from app.core.database import Base, engine
+from app.core.migrations import run_migrations
 from app.models import *  # Import all models to register them
 
 async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # create_all never alters existing tables; versioned migrations do
+    await run_migrations(engine)
 
 if __name__ == "__main__":
     asyncio.run(create_tables())
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from app.routers.user import router as user_router
 from app.routers.role import router as role_router
 from app.routers.project import router as project_router
@@ -16,6 +16,12 @@ from app.routers.report import router as report_router
 from app.routers.admin import router as admin_router
 from app.routers.sync import router as sync_router
 from app.core.security import setup_security_middleware
+from app.core.request_decompression import RequestDecompressionMiddleware
+from app.core.auth import user_cache, hash_pool_stats, require_role_claims, setup_password_hashing
+from app.core.notifications import notification_limiter
+from app.core.database import engine_settings, pool_stats, replica_stats
+from app.core.sync_worker import sync_workers
+from app.core.sync_engine import sync_status_cache
 import os
 
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -37,6 +43,19 @@ else:
     )
 
 setup_security_middleware(app)
+app.add_middleware(RequestDecompressionMiddleware)
+
+@app.on_event("startup")
+async def calibrate_password_hashing():
+    await setup_password_hashing()
+
+@app.on_event("startup")
+async def start_sync_workers():
+    sync_workers.start()
+
+@app.on_event("shutdown")
+async def stop_sync_workers():
+    await sync_workers.stop()
 
 app.include_router(user_router)
 app.include_router(role_router)
@@ -61,4 +80,25 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "environment": ENVIRONMENT} 
\ No newline at end of file
+    return {"status": "healthy", "environment": ENVIRONMENT}
+
+@app.get("/health/auth", dependencies=[Depends(require_role_claims(["Admin"]))])
+def auth_health():
+    return {"user_cache": user_cache.stats(), "password_hash_pool": hash_pool_stats()}
+
+@app.get("/health/notifications", dependencies=[Depends(require_role_claims(["Admin"]))])
+def notifications_health():
+    return {"rate_limiter": notification_limiter.stats()}
+
+@app.get("/health/db", dependencies=[Depends(require_role_claims(["Admin"]))])
+def db_health():
+    settings = engine_settings()
+    return {
+        "pool": pool_stats(),
+        "replica": replica_stats(),
+        "settings": {key: value for key, value in settings.items() if key != "echo"},
+    }
+
+@app.get("/health/sync", dependencies=[Depends(require_role_claims(["Admin"]))])
+def sync_health():
+    return {"workers": sync_workers.stats(), "status_cache": sync_status_cache.stats()}
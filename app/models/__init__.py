@@ -10,4 +10,6 @@ from .task import Task
 from .feedback import Feedback
 from .notification import Notification
 from .admin_log import AdminLog
-from .sync_queue import SyncQueue
\ No newline at end of file
+from .sync_queue import SyncQueue
+from .verdict import Verdict
+from .sync_change import SyncChange
@@ -1,5 +1,5 @@
 from app.core.base import Base
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.types import JSON
@@ -15,7 +15,35 @@ class AdminLog(Base):
 	actor_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 	meta = Column(JSON, nullable=True)
 	created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+	# Copies of the most filtered meta keys, so lookups can use an index
+	# instead of casting JSON. Filled from meta on insert (see below).
+	intern_id = Column(Integer, nullable=True)
+	evaluation_id = Column(Integer, nullable=True)
+	project_id = Column(Integer, nullable=True)
 
 	actor = relationship("User", foreign_keys=[actor_user_id])
 
+	__table_args__ = (
+		Index("ix_admin_logs_intern_id_created_at", "intern_id", "created_at"),
+		Index("ix_admin_logs_evaluation_id", "evaluation_id"),
+		Index("ix_admin_logs_project_id", "project_id"),
+	)
 
+
+PROMOTED_META_KEYS = ("intern_id", "evaluation_id", "project_id")
+
+
+def _as_int(value):
+	try:
+		return int(value)
+	except (TypeError, ValueError):
+		return None
+
+
+@event.listens_for(AdminLog, "before_insert")
+def _promote_meta_keys(mapper, connection, target):
+	if not isinstance(target.meta, dict):
+		return
+	for key in PROMOTED_META_KEYS:
+		if getattr(target, key) is None and key in target.meta:
+			setattr(target, key, _as_int(target.meta[key]))
@@ -1,5 +1,5 @@
 from app.core.base import Base   
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 
 class Attendance(Base):
@@ -8,3 +8,7 @@ class Attendance(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     date = Column(DateTime)
     present = Column(Boolean)
+
+    __table_args__ = (
+        Index("ix_attendance_user_id", "user_id"),
+    )
@@ -1,5 +1,5 @@
 from app.core.base import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.types import JSON
@@ -24,4 +24,8 @@ class Evaluation(Base):
 
     evaluator = relationship("User", foreign_keys=[evaluator_id])
     intern = relationship("User", foreign_keys=[intern_id])
-    project = relationship("Project")
\ No newline at end of file
+    project = relationship("Project")
+
+    __table_args__ = (
+        Index("ix_evaluations_intern_id_created_at", "intern_id", "created_at"),
+    )
@@ -1,5 +1,5 @@
 from app.core.base import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -19,3 +19,7 @@ class Feedback(Base):
     project = relationship("Project", backref="feedbacks")
     intern = relationship("User", foreign_keys=[intern_id], backref="received_feedbacks")
     pm = relationship("User", foreign_keys=[pm_id], backref="given_feedbacks")
+
+    __table_args__ = (
+        Index("ix_feedbacks_intern_id_created_at", "intern_id", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -14,4 +14,9 @@ class Leave(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    user = relationship("User", back_populates="leaves") 
\ No newline at end of file
+    user = relationship("User", back_populates="leaves")
+
+    __table_args__ = (
+        Index("ix_leaves_user_id", "user_id"),
+        Index("ix_leaves_status", "status"),
+    )
@@ -1,5 +1,5 @@
 from app.core.base import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -16,3 +16,7 @@ class Notification(Base):
     
     # Relationship
     user = relationship("User", backref="notifications")
+
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
@@ -0,0 +1,20 @@
+from app.core.base import Base
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index, text
+from sqlalchemy.sql import func
+
+
+class SyncChange(Base):
+    """Per-user change log for /sync/changes, written by database triggers (see migrations)."""
+    __tablename__ = "sync_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    table_name = Column(String, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)  # User who should receive the change
+    operation = Column(String, nullable=False)  # "upsert" or "delete" (tombstone)
+    txid = Column(BigInteger, nullable=False, server_default=text("txid_current()"))
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_sync_changes_user_id_id", "user_id", "id"),
+    )
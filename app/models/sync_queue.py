@@ -1,5 +1,5 @@
 from app.core.base import Base
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.types import JSON
@@ -12,14 +12,25 @@ class SyncQueue(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     operation_type = Column(String, nullable=False)  # "create", "update", "delete"
     table_name = Column(String, nullable=False)  # "evaluations", "tasks", "feedback", etc.
-    record_id = Column(Integer, nullable=True)  # ID of the record (null for create operations)
+    record_id = Column(Integer, nullable=True)  # ID of the record (server-assigned ID once a create completes)
     data = Column(JSON, nullable=False)  # The data to be synced
-    status = Column(String, default="pending")  # "pending", "processing", "completed", "failed"
+    client_op_id = Column(String, nullable=True)  # Client-generated ID used to detect replays
+    client_temp_id = Column(String, nullable=True)  # Client ID for the record a create produced
+    record_temp_id = Column(String, nullable=True)  # Client ID of the record an update/delete targets
+    status = Column(String, default="pending")  # "pending", "processing", "completed", "failed", "dead"
     error_message = Column(Text, nullable=True)  # Error message if sync failed
     retry_count = Column(Integer, default=0)  # Number of retry attempts
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # When a failed item is retried next
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     synced_at = Column(DateTime(timezone=True), nullable=True)  # When the sync was completed
 
     # Relationship
     user = relationship("User", backref="sync_queue_items")
+
+    __table_args__ = (
+        Index("ix_sync_queue_user_id_status", "user_id", "status"),
+        Index("uq_sync_queue_user_id_client_op_id", "user_id", "client_op_id", unique=True),
+        Index("ix_sync_queue_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_sync_queue_user_id_client_temp_id", "user_id", "client_temp_id"),
+    )
@@ -1,5 +1,5 @@
 from app.core.base import Base   
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,4 +15,8 @@ class Task(Base):
     due_date = Column(DateTime(timezone=True), nullable=True) 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    assigned_to = relationship("User", backref="tasks")
\ No newline at end of file
+    assigned_to = relationship("User", backref="tasks")
+
+    __table_args__ = (
+        Index("ix_tasks_assigned_to_id", "assigned_to_id"),
+    )
@@ -13,4 +13,6 @@ class User(Base):
     role = relationship("Role")   
     leaves = relationship("Leave", back_populates="user")
     # Token for push notifications on firebase
-    fcm_token = Column(String, nullable=True)
\ No newline at end of file
+    fcm_token = Column(String, nullable=True)
+    # Bumped to revoke every access token issued before the change
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,51 @@
+from app.core.base import Base
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index, and_, exists, or_, select
+from sqlalchemy.orm import aliased, relationship
+from sqlalchemy.sql import func
+
+class Verdict(Base):
+    __tablename__ = "verdicts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    intern_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    verdict = Column(String, nullable=False)
+    remarks = Column(Text, nullable=True)
+    submitted_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    intern = relationship("User", foreign_keys=[intern_id])
+    submitter = relationship("User", foreign_keys=[submitted_by])
+
+    __table_args__ = (
+        Index("ix_verdicts_intern_id_created_at", "intern_id", "created_at"),
+        Index("ix_verdicts_verdict", "verdict"),
+    )
+
+
+def current_verdicts():
+    """Latest verdict row per intern (DISTINCT ON over the intern/created_at index)."""
+    return (
+        select(Verdict)
+        .distinct(Verdict.intern_id)
+        .order_by(Verdict.intern_id, Verdict.created_at.desc(), Verdict.id.desc())
+    )
+
+
+def interns_with_current_verdict(verdict: str):
+    """Intern ids whose latest verdict is `verdict`.
+
+    Candidate rows come from ix_verdicts_verdict and a NOT EXISTS on the
+    intern/created_at index drops those superseded by a newer verdict, so
+    the whole table is never deduplicated first as with current_verdicts().
+    """
+    newer = aliased(Verdict)
+    return select(Verdict.intern_id).where(
+        Verdict.verdict == verdict,
+        ~exists().where(
+            newer.intern_id == Verdict.intern_id,
+            or_(
+                newer.created_at > Verdict.created_at,
+                and_(newer.created_at == Verdict.created_at, newer.id > Verdict.id),
+            ),
+        ),
+    )
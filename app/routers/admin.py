@@ -3,8 +3,8 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.core.database import get_db
-from app.core.auth import require_roles
+from app.core.database import get_read_db
+from app.core.auth import require_role_claims
 from app.models.admin_log import AdminLog
 from app.schemas.admin_log import AdminLogResponse
 
@@ -17,8 +17,8 @@ async def get_admin_logs(
 	type: Optional[str] = Query(None, description="Filter by log type"),
 	from_datetime: Optional[str] = Query(None, alias="from", description="ISO datetime inclusive"),
 	to_datetime: Optional[str] = Query(None, alias="to", description="ISO datetime inclusive"),
-	db: AsyncSession = Depends(get_db),
-	user=Depends(require_roles(["Admin", "Manager", "HR"]))
+	db: AsyncSession = Depends(get_read_db),
+	claims=Depends(require_role_claims(["Admin", "Manager", "HR"]))
 ):
 	query = select(AdminLog)
 
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.core.database import SessionLocal
 from app.models.user import User
 import app.schemas.token as token_schemas
-from app.core.auth import verify_password, create_access_token
+from app.core.auth import verify_password_async, create_access_token, build_token_data, password_needs_rehash, rehash_password
 from app.core.security import rate_limit_auth
 from sqlalchemy.orm import selectinload
 
@@ -19,18 +19,18 @@ async def get_db():
 
 @router.post("/login", response_model=token_schemas.Token)
 @rate_limit_auth()
-async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+async def login(request: Request, background_tasks: BackgroundTasks, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(User).options(selectinload(User.role)).where(User.email == form_data.username)
     )
     user_obj = result.scalar_one_or_none()
-    if not user_obj or not verify_password(form_data.password, user_obj.hashed_password):
+    if not user_obj or not await verify_password_async(form_data.password, user_obj.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
     
-    access_token = create_access_token(
-        data={
-            "sub": user_obj.email,
-            "role": user_obj.role.name  
-        }
-    )
+    if password_needs_rehash(user_obj.hashed_password):
+        background_tasks.add_task(
+            rehash_password, user_obj.id, user_obj.email, user_obj.hashed_password, form_data.password
+        )
+
+    access_token = create_access_token(data=build_token_data(user_obj))
     return {"access_token": access_token, "token_type": "bearer", "role": user_obj.role.name} 
\ No newline at end of file
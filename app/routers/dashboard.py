@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, select
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.project import Project
 from app.models.task import Task
 from app.models.leave import Leave
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 @router.get("/ceo-metrics")
 async def get_ceo_dashboard_metrics(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role_id != 6:
@@ -36,7 +36,7 @@ async def get_ceo_dashboard_metrics(
 
 @router.get("/task-status-summary")
 async def get_task_status_summary(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role_id != 6:
@@ -4,7 +4,8 @@ from sqlalchemy.future import select
 from app.core.database import get_db
 from app.models.department import Department
 from app.schemas.department import DepartmentCreate, DepartmentUpdate, Department as DepartmentSchema
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_token_claims
+from app.schemas.token import TokenClaims
 from app.models.user import User
 from app.models.hr_department_map import HRDepartmentMap
 from app.schemas.hr_department_map import (
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/departments", tags=["Departments"])
 @router.get("/", response_model=List[DepartmentSchema])
 async def get_all_departments(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    claims: TokenClaims = Depends(get_token_claims)
 ):
     result = await db.execute(select(Department))
     departments = result.scalars().all()
@@ -30,7 +31,7 @@ async def get_all_departments(
 async def get_department(
     department_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    claims: TokenClaims = Depends(get_token_claims)
 ):
     result = await db.execute(select(Department).where(Department.id == department_id))
     department = result.scalar_one_or_none()
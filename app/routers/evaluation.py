@@ -2,13 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.auth import get_current_user
 from app.models.user import User
 from app.models.evaluation import Evaluation
 from app.models.project import Project
 from app.schemas.evaluation import EvaluationCreate, EvaluationResponse, FinalEvaluationCreate, LockEvaluation, LockStatusResponse, VerdictSubmit, VerdictResponse, VerdictSummaryResponse, EvaluationArchiveResponse, EvaluationHistoryResponse, EvaluationHistoryItem, SignatureRejectionRequest, SignatureRejectionResponse, InternReportData
 from app.models.admin_log import AdminLog
+from app.models.verdict import Verdict, current_verdicts, interns_with_current_verdict
 from app.models.attendance import Attendance
 from app.models.leave import Leave
 from app.models.task import Task
@@ -18,14 +19,8 @@ from app.core.security import rate_limit_sensitive
 from datetime import datetime
 from sqlalchemy.orm import aliased
 import io
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
 from fastapi.responses import StreamingResponse
 from fastapi import Request
-from sqlalchemy import cast, String
 
 router = APIRouter(prefix="/evaluation", tags=["Evaluation"])
 
@@ -234,6 +229,12 @@ async def submit_verdict(
     submitted_at = datetime.utcnow()
 
     try:
+        db.add(Verdict(
+            intern_id=payload.intern_id,
+            verdict=payload.verdict,
+            remarks=payload.remarks,
+            submitted_by=current_user.id,
+        ))
         db.add(AdminLog(
             type="evaluation_verdict",
             message="Verdict submitted",
@@ -302,7 +303,7 @@ async def verdict_summary(
 
 @router.get('/evaluation_archive', response_model=List[EvaluationArchiveResponse])
 async def evaluation_archive(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     intern_id: Optional[int] = None,
     date_range: Optional[str] = None,
@@ -339,11 +340,7 @@ async def evaluation_archive(
             raise HTTPException(status_code=400, detail="Invalid date range format. Use YYYY-MM-DD,YYYY-MM-DD")
     
     if verdict:
-        verdict_query = select(cast(AdminLog.meta["intern_id"], String)).where(
-            AdminLog.type == "evaluation_verdict",
-            cast(AdminLog.meta["verdict"], String) == verdict
-        )
-        query = query.where(cast(Evaluation.intern_id, String).in_(verdict_query))
+        query = query.where(Evaluation.intern_id.in_(interns_with_current_verdict(verdict)))
     
     query = query.order_by(Evaluation.created_at.desc())
     
@@ -393,7 +390,7 @@ async def evaluation_history(
             ActorUser, AdminLog.actor_user_id == ActorUser.id, isouter=True
         ).where(
             AdminLog.type.in_(["evaluation_lock", "evaluation_verdict", "evaluation_final"]),
-            cast(AdminLog.meta["intern_id"], String) == str(intern_id)
+            AdminLog.intern_id == intern_id
         ).order_by(AdminLog.created_at.desc())
     )
     
@@ -492,50 +489,53 @@ async def reject_signature(
 async def generate_intern_report(
     intern_id: int,
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     if not current_user.role or current_user.role.name.lower() not in {"hr", "admin", "pm", "manager"}:
         raise HTTPException(status_code=403, detail="Insufficient permissions to generate intern report")
     
-    result = await db.execute(select(User).where(User.id == intern_id))
+    result = await read_db.execute(select(User).where(User.id == intern_id))
     intern = result.scalar_one_or_none()
     if not intern:
         raise HTTPException(status_code=404, detail="Intern not found")
     
-    result = await db.execute(select(Attendance).where(Attendance.user_id == intern_id))
+    result = await read_db.execute(select(Attendance).where(Attendance.user_id == intern_id))
     attendance_records = result.scalars().all()
     
     total_days = len(attendance_records)
     present_days = sum(1 for record in attendance_records if record.present)
     attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
     
-    result = await db.execute(select(Leave).where(Leave.user_id == intern_id))
+    result = await read_db.execute(select(Leave).where(Leave.user_id == intern_id))
     leave_count = len(result.scalars().all())
     
-    result = await db.execute(select(Task).where(Task.assigned_to_id == intern_id))
+    result = await read_db.execute(select(Task).where(Task.assigned_to_id == intern_id))
     tasks = result.scalars().all()
     total_tasks = len(tasks)
     tasks_completed = sum(1 for task in tasks if task.status == "approved")
     
-    result = await db.execute(select(Feedback).where(Feedback.intern_id == intern_id))
+    result = await read_db.execute(select(Feedback).where(Feedback.intern_id == intern_id))
     feedbacks = result.scalars().all()
     average_rating = 0
     if feedbacks:
         total_rating = sum(feedback.rating for feedback in feedbacks)
         average_rating = total_rating / len(feedbacks)
     
-    result = await db.execute(
-        select(AdminLog).where(
-            AdminLog.type == "evaluation_verdict",
-            cast(AdminLog.meta["intern_id"], String) == str(intern_id)
-        ).order_by(AdminLog.created_at.desc())
+    result = await read_db.execute(
+        current_verdicts().where(Verdict.intern_id == intern_id)
     )
-    latest_verdict_row = result.first()
-    latest_verdict = latest_verdict_row[0] if latest_verdict_row else None
-    verdict = latest_verdict.meta.get("verdict") if latest_verdict else None
-    remarks = latest_verdict.meta.get("remarks") if latest_verdict else None
+    latest_verdict = result.scalar_one_or_none()
+    verdict = latest_verdict.verdict if latest_verdict else None
+    remarks = latest_verdict.remarks if latest_verdict else None
     
-    # Generate PDF
+    # Generate PDF; reportlab is imported here so workers don't pay for it at startup
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     styles = getSampleStyleSheet()
@@ -639,9 +639,9 @@ async def verify_signature(
     result = await db.execute(
         select(AdminLog).where(
             AdminLog.type == "evaluation_final",
-            cast(AdminLog.meta["project_id"], String) == str(evaluation.project_id),
-            cast(AdminLog.meta["intern_id"], String) == str(evaluation.intern_id)
-        ).order_by(AdminLog.created_at.desc())
+            AdminLog.project_id == evaluation.project_id,
+            AdminLog.intern_id == evaluation.intern_id
+        ).order_by(AdminLog.created_at.desc()).limit(1)
     )
     latest_log = result.scalar_one_or_none()
     expected_hash = latest_log.meta.get("signature_hash") if latest_log else None
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.leave import Leave
 from app.models.user import User
 from app.models.role import Role
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/export", tags=["Export"])
 
 @router.get("/leaves-csv")
 async def export_leaves_csv(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user)
 ):
     result = await db.execute(
@@ -59,7 +59,7 @@ async def export_leaves_csv(
 
 @router.get("/users-csv")
 async def export_users_csv(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user)
 ):
     result = await db.execute(select(User).options(selectinload(User.role)))
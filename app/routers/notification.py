@@ -3,7 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_token_claims
+from app.schemas.token import TokenClaims
 from app.models.user import User
 from app.models.notification import Notification
 from app.schemas.notification import (
@@ -19,11 +20,11 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
 @router.get("/", response_model=List[NotificationResponse])
 async def get_user_notifications(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    claims: TokenClaims = Depends(get_token_claims)
 ):
     result = await db.execute(
         select(Notification)
-        .where(Notification.user_id == current_user.id)
+        .where(Notification.user_id == claims.user_id)
         .order_by(Notification.created_at.desc())
     )
     notifications = result.scalars().all()
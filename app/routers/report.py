@@ -4,7 +4,7 @@ from sqlalchemy.future import select
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime, date
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.auth import require_roles
 from app.models.admin_log import AdminLog
 from app.models.user import User
@@ -41,6 +41,7 @@ async def generate_performance_report(
     start_date: Optional[date] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(require_roles(["Admin", "Manager", "HR", "PM"]))
 ):
     query = (
@@ -79,7 +80,7 @@ async def generate_performance_report(
         )
         query = query.where(Feedback.intern_id.in_(dept_users_query))
     
-    result = await db.execute(query)
+    result = await read_db.execute(query)
     feedback_data = result.all()
     
     if not feedback_data:
@@ -107,7 +108,7 @@ async def generate_performance_report(
     
     project_info = None
     if project_id:
-        result = await db.execute(select(Project).where(Project.id == project_id))
+        result = await read_db.execute(select(Project).where(Project.id == project_id))
         project_info = result.scalar_one_or_none()
         if not project_info:
             raise HTTPException(status_code=404, detail="Project not found")
@@ -1,275 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import func, delete
+from typing import List, Optional
 from datetime import datetime
+import json
 import logging
+import os
+import tempfile
 from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, require_role_claims, require_roles
+from app.core.sync_engine import apply_sync_batch, enqueue_sync_batch, retry_failed_items, sync_status_cache, invalidate_sync_status
+from app.core.sync_worker import sync_workers
+from app.core.sync_changes import cursor_expired, fetch_changes
 from app.models.user import User
 from app.models.sync_queue import SyncQueue
-from app.models.evaluation import Evaluation
-from app.models.task import Task
-from app.models.feedback import Feedback
-from app.models.leave import Leave
-from app.models.attendance import Attendance
-from app.schemas.sync_queue import (SyncQueueCreate, SyncQueueResponse, SyncQueueStatus, SyncResult)
+from app.schemas.sync_queue import (SyncQueueCreate, SyncQueueItem, SyncQueueResponse, SyncQueueStatus, SyncResult, SyncChangesResponse)
 from app.models.admin_log import AdminLog
+from app.schemas.token import TokenClaims
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/sync", tags=["Sync"])
 
-
-def _process_evaluation_sync(db: AsyncSession, operation_type: str, data: dict, record_id: int = None) -> dict:
-    try:
-        if operation_type == "create":
-            evaluation = Evaluation(**data)
-            db.add(evaluation)
-            return {"success": True, "record_id": None, "message": "Evaluation created successfully"}
-        
-        elif operation_type == "update":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for update operation"}
-            
-            # We'll handle the actual update in the main function
-            return {"success": True, "record_id": record_id, "message": "Evaluation update prepared"}
-        
-        elif operation_type == "delete":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for delete operation"}
-            
-            # We'll handle the actual deletion in the main function
-            return {"success": True, "record_id": record_id, "message": "Evaluation deletion prepared"}
-        
-        else:
-            return {"success": False, "message": f"Unsupported operation type: {operation_type}"}
-    
-    except Exception as e:
-        logger.error(f"Error processing evaluation sync: {e}")
-        return {"success": False, "message": f"Error processing evaluation sync: {str(e)}"}
-
-
-def _process_task_sync(db: AsyncSession, operation_type: str, data: dict, record_id: int = None) -> dict:
-    try:
-        if operation_type == "create":
-            task = Task(**data)
-            db.add(task)
-            return {"success": True, "record_id": None, "message": "Task created successfully"}
-        
-        elif operation_type == "update":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for update operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Task update prepared"}
-        
-        elif operation_type == "delete":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for delete operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Task deletion prepared"}
-        
-        else:
-            return {"success": False, "message": f"Unsupported operation type: {operation_type}"}
-    
-    except Exception as e:
-        logger.error(f"Error processing task sync: {e}")
-        return {"success": False, "message": f"Error processing task sync: {str(e)}"}
-
-
-def _process_feedback_sync(db: AsyncSession, operation_type: str, data: dict, record_id: int = None) -> dict:
-    try:
-        if operation_type == "create":
-            feedback = Feedback(**data)
-            db.add(feedback)
-            return {"success": True, "record_id": None, "message": "Feedback created successfully"}
-        
-        elif operation_type == "update":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for update operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Feedback update prepared"}
-        
-        elif operation_type == "delete":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for delete operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Feedback deletion prepared"}
-        
-        else:
-            return {"success": False, "message": f"Unsupported operation type: {operation_type}"}
-    
-    except Exception as e:
-        logger.error(f"Error processing feedback sync: {e}")
-        return {"success": False, "message": f"Error processing feedback sync: {str(e)}"}
-
-
-def _process_leave_sync(db: AsyncSession, operation_type: str, data: dict, record_id: int = None) -> dict:
-    try:
-        if operation_type == "create":
-            leave = Leave(**data)
-            db.add(leave)
-            return {"success": True, "record_id": None, "message": "Leave created successfully"}
-        
-        elif operation_type == "update":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for update operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Leave update prepared"}
-        
-        elif operation_type == "delete":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for delete operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Leave deletion prepared"}
-        
-        else:
-            return {"success": False, "message": f"Unsupported operation type: {operation_type}"}
-    
-    except Exception as e:
-        logger.error(f"Error processing leave sync: {e}")
-        return {"success": False, "message": f"Error processing leave sync: {str(e)}"}
-
-
-def _process_attendance_sync(db: AsyncSession, operation_type: str, data: dict, record_id: int = None) -> dict:
-    try:
-        if operation_type == "create":
-            attendance = Attendance(**data)
-            db.add(attendance)
-            return {"success": True, "record_id": None, "message": "Attendance created successfully"}
-        
-        elif operation_type == "update":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for update operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Attendance update prepared"}
-        
-        elif operation_type == "delete":
-            if not record_id:
-                return {"success": False, "message": "Record ID required for delete operation"}
-            
-            return {"success": True, "record_id": record_id, "message": "Attendance deletion prepared"}
-        
-        else:
-            return {"success": False, "message": f"Unsupported operation type: {operation_type}"}
-    
-    except Exception as e:
-        logger.error(f"Error processing attendance sync: {e}")
-        return {"success": False, "message": f"Error processing attendance sync: {str(e)}"}
-
-
-def _process_sync_item(db: AsyncSession, queue_item: SyncQueue) -> dict:
-    try:
-        queue_item.status = "processing"
-        
-        if queue_item.table_name == "evaluations":
-            result = _process_evaluation_sync(
-                db, queue_item.operation_type, queue_item.data, queue_item.record_id
-            )
-        elif queue_item.table_name == "tasks":
-            result = _process_task_sync(
-                db, queue_item.operation_type, queue_item.data, queue_item.record_id
-            )
-        elif queue_item.table_name == "feedbacks":
-            result = _process_feedback_sync(
-                db, queue_item.operation_type, queue_item.data, queue_item.record_id
-            )
-        elif queue_item.table_name == "leaves":
-            result = _process_leave_sync(
-                db, queue_item.operation_type, queue_item.data, queue_item.record_id
-            )
-        elif queue_item.table_name == "attendance":
-            result = _process_attendance_sync(
-                db, queue_item.operation_type, queue_item.data, queue_item.record_id
-            )
-        else:
-            result = {"success": False, "message": f"Unsupported table: {queue_item.table_name}"}
-        
-        if result["success"]:
-            queue_item.status = "completed"
-            queue_item.synced_at = datetime.utcnow()
-        else:
-            queue_item.status = "failed"
-            queue_item.error_message = result["message"]
-            queue_item.retry_count += 1
-        
-        return result
-    
-    except Exception as e:
-        logger.error(f"Error processing sync item {queue_item.id}: {e}")
-        queue_item.status = "failed"
-        queue_item.error_message = str(e)
-        queue_item.retry_count += 1
-        return {"success": False, "message": f"Error processing sync: {str(e)}"}
+SYNC_STREAM_CHUNK_SIZE = int(os.getenv("SYNC_STREAM_CHUNK_SIZE", "500"))
+SYNC_STREAM_MAX_LINE_BYTES = int(os.getenv("SYNC_STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
+SYNC_STREAM_SPOOL_BYTES = int(os.getenv("SYNC_STREAM_SPOOL_BYTES", str(1024 * 1024)))
+SYNC_CHANGES_MAX_LIMIT = 1000
 
 
 @router.post("/offline_data", response_model=List[SyncQueueResponse])
 async def sync_offline_data(
     sync_data: SyncQueueCreate,
+    response: Response,
+    mode: str = "sync",
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    if mode not in {"sync", "async"}:
+        raise HTTPException(status_code=400, detail="mode must be 'sync' or 'async'")
+
+    if mode == "async":
+        # Queue only; background workers apply the items and /sync/queue_status reports progress
+        try:
+            queue_items = await enqueue_sync_batch(db, current_user.id, sync_data.items)
+            results = [SyncQueueResponse.model_validate(queue_item) for queue_item in queue_items]
+            await db.commit()
+            invalidate_sync_status(current_user.id)
+        except Exception as e:
+            logger.error(f"Error queueing offline sync: {e}")
+            raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+        sync_workers.notify()
+        response.status_code = 202
+        logger.info(f"Offline sync queued for user {current_user.id}: {len(sync_data.items)} items")
+        return results
+
     try:
-        queue_items = []
-        results = []
-        
-        # Process each item individually
-        for item in sync_data.items:
-            try:
-                # Create queue item
-                queue_item = SyncQueue(
-                    user_id=current_user.id,
-                    operation_type=item.operation_type,
-                    table_name=item.table_name,
-                    record_id=item.record_id,
-                    data=item.data,
-                    status="pending"
-                )
-                db.add(queue_item)
-                await db.flush()  # Flush to get the ID
-                
-                # Process the sync item
-                result = _process_sync_item(db, queue_item)
-                
-                # Create response
-                response = SyncQueueResponse(
-                    id=queue_item.id,
-                    user_id=queue_item.user_id,
-                    operation_type=queue_item.operation_type,
-                    table_name=queue_item.table_name,
-                    record_id=queue_item.record_id,
-                    data=queue_item.data,
-                    status=queue_item.status,
-                    error_message=queue_item.error_message,
-                    retry_count=queue_item.retry_count,
-                    created_at=queue_item.created_at,
-                    updated_at=queue_item.updated_at,
-                    synced_at=queue_item.synced_at
-                )
-                results.append(response)
-                queue_items.append(queue_item)
-                
-            except Exception as e:
-                logger.error(f"Error processing sync item: {e}")
-                # Create a failed response
-                failed_response = SyncQueueResponse(
-                    id=0,  # Temporary ID
-                    user_id=current_user.id,
-                    operation_type=item.operation_type,
-                    table_name=item.table_name,
-                    record_id=item.record_id,
-                    data=item.data,
-                    status="failed",
-                    error_message=str(e),
-                    retry_count=0,
-                    created_at=datetime.utcnow(),
-                    updated_at=None,
-                    synced_at=None
-                )
-                results.append(failed_response)
+        queue_items = await apply_sync_batch(db, current_user.id, sync_data.items)
+        results = [SyncQueueResponse.model_validate(queue_item) for queue_item in queue_items]
         
         # Commit all changes at once
         await db.commit()
+        invalidate_sync_status(current_user.id)
         
         # Log the sync operation
         try:
@@ -280,7 +73,7 @@ async def sync_offline_data(
                 meta={
                     "total_items": len(sync_data.items),
                     "successful_items": len([r for r in results if r.status == "completed"]),
-                    "failed_items": len([r for r in results if r.status == "failed"])
+                    "failed_items": len([r for r in results if r.status != "completed"])
                 }
             ))
             await db.commit()
@@ -295,55 +88,172 @@ async def sync_offline_data(
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
 
 
+async def _ndjson_lines(request: Request):
+    """Yield (line_number, raw_line) from an NDJSON body without buffering the whole body."""
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > SYNC_STREAM_MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"NDJSON line {line_number + 1} exceeds {SYNC_STREAM_MAX_LINE_BYTES} bytes")
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def _write_ndjson(spool, line_number: int, payload: dict) -> None:
+    spool.write(json.dumps({"line": line_number, **payload}, default=str).encode())
+    spool.write(b"\n")
+
+
+def _iter_spool(spool, chunk_size: int = 64 * 1024):
+    try:
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+@router.post("/offline_data/stream")
+async def sync_offline_data_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Apply an application/x-ndjson upload (one SyncQueueItem per line) in bounded chunks.
+
+    Lines are validated as they arrive and applied SYNC_STREAM_CHUNK_SIZE at a
+    time with a commit per chunk. Per-line results are spooled (to disk past
+    SYNC_STREAM_SPOOL_BYTES) and streamed back as NDJSON once the body is
+    consumed, so memory stays flat however large the upload is.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type != "application/x-ndjson":
+        raise HTTPException(status_code=415, detail="Expected Content-Type: application/x-ndjson")
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SYNC_STREAM_SPOOL_BYTES)
+    counts = {"total": 0, "completed": 0, "failed": 0}
+
+    async def flush(chunk):
+        try:
+            queue_items = await apply_sync_batch(db, current_user.id, [item for _, item in chunk])
+            payloads = [SyncQueueResponse.model_validate(queue_item).model_dump(mode="json") for queue_item in queue_items]
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error in streamed offline sync chunk: {e}")
+            payloads = [{"status": "failed", "error_message": f"Sync failed: {str(e)}"} for _ in chunk]
+        for (line_number, _), payload in zip(chunk, payloads):
+            counts["completed" if payload["status"] == "completed" else "failed"] += 1
+            _write_ndjson(spool, line_number, payload)
+
+    try:
+        chunk = []
+        async for line_number, line in _ndjson_lines(request):
+            counts["total"] += 1
+            try:
+                item = SyncQueueItem.model_validate_json(line)
+            except ValidationError as e:
+                counts["failed"] += 1
+                _write_ndjson(spool, line_number, {"status": "failed", "error_message": f"Invalid item: {e.errors(include_url=False)}"})
+                continue
+            chunk.append((line_number, item))
+            if len(chunk) >= SYNC_STREAM_CHUNK_SIZE:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    invalidate_sync_status(current_user.id)
+
+    try:
+        db.add(AdminLog(
+            type="offline_sync",
+            message=f"Streamed offline data sync completed: {counts['total']} items",
+            actor_user_id=current_user.id,
+            meta={
+                "total_items": counts["total"],
+                "successful_items": counts["completed"],
+                "failed_items": counts["failed"],
+                "streamed": True,
+            }
+        ))
+        await db.commit()
+    except Exception:
+        pass
+
+    logger.info(f"Streamed offline sync completed for user {current_user.id}: {counts['total']} items")
+    return StreamingResponse(_iter_spool(spool), media_type="application/x-ndjson")
+
+
+@router.get("/changes", response_model=SyncChangesResponse)
+async def get_sync_changes(
+    cursor: int = 0,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Everything that changed for the current user since `cursor` (0 = full download).
+
+    Answers 410 when the log has been pruned past `cursor`; the client then
+    starts over from cursor 0.
+    """
+    limit = max(1, min(limit, SYNC_CHANGES_MAX_LIMIT))
+    try:
+        if await cursor_expired(db, cursor):
+            raise HTTPException(status_code=410, detail="Cursor expired, pull again from cursor 0")
+        changes, next_cursor, has_more = await fetch_changes(db, current_user.id, cursor, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting sync changes: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get changes: {str(e)}")
+    return SyncChangesResponse(changes=changes, cursor=next_cursor, has_more=has_more)
+
+
 @router.get("/queue_status", response_model=SyncQueueStatus)
 async def get_sync_queue_status(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    cached = sync_status_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
     try:
+        finished = SyncQueue.status.in_(["completed", "failed", "dead"])
         result = await db.execute(
-            select(func.count(SyncQueue.id)).where(SyncQueue.user_id == current_user.id)
-        )
-        total_items = result.scalar()
-        result = await db.execute(
-            select(func.count(SyncQueue.id)).where(
-                SyncQueue.user_id == current_user.id,
-                SyncQueue.status == "pending"
-            )
+            select(
+                func.count(SyncQueue.id),
+                func.count(SyncQueue.id).filter(SyncQueue.status == "pending"),
+                func.count(SyncQueue.id).filter(SyncQueue.status == "completed"),
+                func.count(SyncQueue.id).filter(SyncQueue.status == "failed"),
+                func.count(SyncQueue.id).filter(SyncQueue.status == "dead"),
+                func.max(func.coalesce(SyncQueue.updated_at, SyncQueue.created_at)).filter(finished),
+            ).where(SyncQueue.user_id == current_user.id)
         )
-        pending_items = result.scalar()
+        total_items, pending_items, completed_items, failed_items, dead_items, last_sync_attempt = result.one()
         
-        result = await db.execute(
-            select(func.count(SyncQueue.id)).where(
-                SyncQueue.user_id == current_user.id,
-                SyncQueue.status == "completed"
-            )
-        )
-        completed_items = result.scalar()
-        
-        result = await db.execute(
-            select(func.count(SyncQueue.id)).where(
-                SyncQueue.user_id == current_user.id,
-                SyncQueue.status == "failed"
-            )
-        )
-        failed_items = result.scalar()
-        
-        result = await db.execute(
-            select(SyncQueue.updated_at).where(
-                SyncQueue.user_id == current_user.id,
-                SyncQueue.status.in_(["completed", "failed"])
-            ).order_by(SyncQueue.updated_at.desc())
-        )
-        last_sync_attempt = result.scalar()
-        
-        return SyncQueueStatus(
+        status = SyncQueueStatus(
             total_items=total_items,
             pending_items=pending_items,
             completed_items=completed_items,
             failed_items=failed_items,
+            dead_items=dead_items,
             last_sync_attempt=last_sync_attempt
         )
+        sync_status_cache.set(current_user.id, status)
+        return status
     
     except Exception as e:
         logger.error(f"Error getting sync queue status: {e}")
@@ -397,37 +307,64 @@ async def retry_failed_sync_items(
     current_user: User = Depends(get_current_user),
 ):
     try:
-        result = await db.execute(
-            select(SyncQueue).where(
-                SyncQueue.user_id == current_user.id,
-                SyncQueue.status == "failed"
-            )
-        )
-        failed_items = result.scalars().all()
-        
-        results = []
-        for item in failed_items:
-            item.status = "pending"
-            item.error_message = None
-            await db.commit()
-            
-            result = await _process_sync_item(db, item)
-            
-            results.append(SyncResult(
-                queue_id=item.id,
-                success=result["success"],
-                message=result["message"],
-                synced_at=datetime.utcnow()
-            ))
+        # A manual retry ignores the backoff window but never touches dead-lettered items
+        processed = await retry_failed_items(db, current_user.id)
+        invalidate_sync_status(current_user.id)
+        synced_at = datetime.utcnow()
+        results = [
+            SyncResult(queue_id=queue_id, success=result["success"], message=result["message"], synced_at=synced_at)
+            for queue_id, result in processed
+        ]
         
-        logger.info(f"Retry completed for user {current_user.id}: {len(failed_items)} items")
+        logger.info(f"Retry completed for user {current_user.id}: {len(results)} items")
         return results
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrying failed sync items: {e}")
         raise HTTPException(status_code=500, detail=f"Retry failed: {str(e)}")
 
 
+@router.get("/dead_letter", response_model=List[SyncQueueResponse])
+async def get_dead_letter_items(
+    user_id: Optional[int] = None,
+    limit: int = 50,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_db),
+    claims: TokenClaims = Depends(require_role_claims(["Admin"])),
+):
+    query = select(SyncQueue).where(SyncQueue.status == "dead")
+    if user_id:
+        query = query.where(SyncQueue.user_id == user_id)
+    result = await db.execute(query.order_by(SyncQueue.id.desc()).offset(offset).limit(limit))
+    return [SyncQueueResponse.model_validate(item) for item in result.scalars().all()]
+
+
+@router.post("/dead_letter/{queue_id}/requeue", response_model=SyncQueueResponse)
+async def requeue_dead_letter_item(
+    queue_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["Admin"])),
+):
+    result = await db.execute(
+        select(SyncQueue).where(SyncQueue.id == queue_id, SyncQueue.status == "dead")
+    )
+    item = result.scalar_one_or_none()
+    if not item:
+        raise HTTPException(status_code=404, detail="Dead-lettered sync item not found")
+    
+    item.status = "pending"
+    item.retry_count = 0
+    item.error_message = None
+    item.next_attempt_at = None
+    await db.commit()
+    await db.refresh(item)
+    invalidate_sync_status(item.user_id)
+    sync_workers.notify()
+    return SyncQueueResponse.model_validate(item)
+
+
 @router.delete("/clear_completed")
 async def clear_completed_sync_items(
     db: AsyncSession = Depends(get_db),
@@ -435,20 +372,17 @@ async def clear_completed_sync_items(
 ):
     try:
         result = await db.execute(
-            select(SyncQueue).where(
+            delete(SyncQueue).where(
                 SyncQueue.user_id == current_user.id,
                 SyncQueue.status == "completed"
             )
         )
-        completed_items = result.scalars().all()
-        
-        for item in completed_items:
-            await db.delete(item)
-        
         await db.commit()
+        invalidate_sync_status(current_user.id)
+        cleared = result.rowcount
         
-        logger.info(f"Cleared {len(completed_items)} completed sync items for user {current_user.id}")
-        return {"message": f"Cleared {len(completed_items)} completed sync items"}
+        logger.info(f"Cleared {cleared} completed sync items for user {current_user.id}")
+        return {"message": f"Cleared {cleared} completed sync items"}
     
     except Exception as e:
         logger.error(f"Error clearing completed sync items: {e}")
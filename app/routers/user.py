@@ -7,7 +7,7 @@ from app.core.database import get_db
 from app.models.user import User
 from app.models.role import Role
 from app.schemas.user import UserCreate, UserResponse
-from app.core.auth import get_password_hash, require_roles, get_current_user
+from app.core.auth import get_password_hash_async, require_roles, require_role_claims, get_current_user, invalidate_token_caches, invalidate_user_cache, revoke_user_tokens
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/user", tags=["User"])
@@ -27,7 +27,7 @@ async def register_candidate(user_in: UserCreate, db: AsyncSession = Depends(get
             email=user_in.email,
             full_name=user_in.full_name,
             phone=user_in.phone,
-            hashed_password=get_password_hash(user_in.password),
+            hashed_password=await get_password_hash_async(user_in.password),
             role_id=role.id,
             fcm_token=user_in.fcm_token,
         )
@@ -67,13 +67,14 @@ async def add_user(user_in: UserCreate, db: AsyncSession = Depends(get_db), user
             email=user_in.email,
             full_name=user_in.full_name,
             phone=user_in.phone,
-            hashed_password=get_password_hash(user_in.password),
+            hashed_password=await get_password_hash_async(user_in.password),
             role_id=user_in.role_id,
             fcm_token=user_in.fcm_token,
         )
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        invalidate_user_cache(user.email)
         
         result = await db.execute(
             select(User).options(selectinload(User.role)).filter(User.id == user.id)
@@ -129,7 +130,23 @@ async def update_fcm_token(
         current_user.fcm_token = token_data.fcm_token
         db.add(current_user)
         await db.commit()
+        invalidate_user_cache(current_user.email)
         return {"message": "FCM token updated successfully"}
     except Exception:
         await db.rollback()
-        raise HTTPException(status_code=500, detail="Failed to update FCM token")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to update FCM token")
+
+@router.post("/revoke-tokens/{user_id}")
+async def revoke_tokens(user_id: int, db: AsyncSession = Depends(get_db), claims=Depends(require_role_claims(["Admin"]))):
+    result = await db.execute(select(User).filter(User.id == user_id))
+    target = result.scalar_one_or_none()
+    if not target:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        await revoke_user_tokens(db, target)
+        await db.commit()
+        invalidate_token_caches(target.id, target.email)
+        return {"message": "Tokens revoked successfully"}
+    except Exception:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to revoke tokens")
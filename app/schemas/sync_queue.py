@@ -8,6 +8,9 @@ class SyncQueueItem(BaseModel):
     table_name: str = Field(..., description="Name of the table to sync")
     record_id: Optional[int] = Field(None, description="ID of the record (null for create)")
     data: Dict[str, Any] = Field(..., description="Data to be synced")
+    client_op_id: Optional[str] = Field(None, max_length=64, description="Client-generated ID; replays with the same ID return the original result")
+    client_temp_id: Optional[str] = Field(None, max_length=64, description="Client ID for a record created by this item; the response carries its server ID")
+    record_temp_id: Optional[str] = Field(None, max_length=64, description="Target a record created earlier by its client_temp_id instead of record_id")
 
 
 class SyncQueueCreate(BaseModel):
@@ -21,9 +24,13 @@ class SyncQueueResponse(BaseModel):
     table_name: str
     record_id: Optional[int]
     data: Dict[str, Any]
+    client_op_id: Optional[str] = None
+    client_temp_id: Optional[str] = None
+    record_temp_id: Optional[str] = None
     status: str
     error_message: Optional[str]
     retry_count: int
+    next_attempt_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime]
     synced_at: Optional[datetime]
@@ -37,6 +44,7 @@ class SyncQueueStatus(BaseModel):
     pending_items: int
     completed_items: int
     failed_items: int
+    dead_items: int = 0
     last_sync_attempt: Optional[datetime]
 
 
@@ -45,3 +53,16 @@ class SyncResult(BaseModel):
     success: bool
     message: str
     synced_at: datetime
+
+
+class SyncChangeItem(BaseModel):
+    table_name: str
+    record_id: int
+    operation: str  # "upsert" or "delete"
+    data: Optional[Dict[str, Any]] = None
+
+
+class SyncChangesResponse(BaseModel):
+    changes: List[SyncChangeItem]
+    cursor: int = Field(..., description="Pass back as ?cursor= to continue")
+    has_more: bool = Field(..., description="False once no further committed changes are ready; pull again later")
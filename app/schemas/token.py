@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class Token(BaseModel):
     model_config = {
@@ -6,4 +7,11 @@ class Token(BaseModel):
     }
     access_token: str
     token_type: str 
-    role: str
\ No newline at end of file
+    role: str
+
+class TokenClaims(BaseModel):
+    sub: str
+    user_id: int
+    role: Optional[str] = None
+    role_id: Optional[int] = None
+    token_version: int = 0
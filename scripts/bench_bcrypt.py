@@ -0,0 +1,36 @@
+"""Report bcrypt throughput per core for a range of work factors.
+
+Usage: python scripts/bench_bcrypt.py [--min 10] [--max 14] [--target-ms 250]
+
+Use the output to pick BCRYPT_ROUNDS for a deployment: login capacity per
+core is roughly the hashes/second figure for the chosen cost.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.password_cost import time_bcrypt_hash, calibrate_bcrypt_rounds  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min", type=int, default=10, dest="min_rounds")
+    parser.add_argument("--max", type=int, default=14, dest="max_rounds")
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'rounds':>6}  {'ms/hash':>9}  {'hashes/s/core':>13}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        seconds = time_bcrypt_hash(rounds, samples=args.samples)
+        print(f"{rounds:>6}  {seconds * 1000:>9.1f}  {1 / seconds:>13.2f}")
+
+    chosen = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"calibrated rounds for {args.target_ms:.0f} ms target: {chosen}")
+
+
+if __name__ == "__main__":
+    main()
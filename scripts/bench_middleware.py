@@ -0,0 +1,105 @@
+"""Compare requests/second of the BaseHTTPMiddleware and pure ASGI security stacks.
+
+Usage: python scripts/bench_middleware.py [--requests 2000] [--concurrency 50] [--csv-rows 5000]
+
+Both stacks wrap the same two endpoints, shaped like /health and
+/export/leaves-csv, and are driven in-process through httpx's ASGI
+transport, so the numbers isolate middleware overhead from the network
+and the database.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException, Request, status  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.security import APIKeyMiddleware, SecurityHeadersMiddleware, SECURITY_HEADERS  # noqa: E402
+
+API_KEY = "bench-api-key"
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+class LegacyAPIKeyMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, api_key: str = None):
+        super().__init__(app)
+        self.api_key = api_key
+
+    async def dispatch(self, request: Request, call_next):
+        public_paths = ["/", "/docs", "/redoc", "/openapi.json", "/login", "/register", "/health"]
+        if request.url.path in public_paths:
+            return await call_next(request)
+        if request.headers.get("X-API-Key") == self.api_key:
+            return await call_next(request)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+
+def build_app(legacy: bool, csv_rows: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    @app.get("/export/leaves-csv")
+    def leaves_csv():
+        def rows():
+            yield b"Leave ID,User ID,Status\n"
+            for i in range(csv_rows):
+                yield f"{i},{i % 97},approved\n".encode()
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    if legacy:
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyAPIKeyMiddleware, api_key=API_KEY)
+    else:
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(APIKeyMiddleware, api_key=API_KEY)
+    return app
+
+
+async def measure(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"X-API-Key": API_KEY}) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(min(total, 100))))  # warm-up
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--csv-rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'path':<20} {'before rps':>12} {'after rps':>12} {'change':>8}")
+    for path, total in (("/health", args.requests), ("/export/leaves-csv", max(1, args.requests // 10))):
+        before = await measure(build_app(True, args.csv_rows), path, total, args.concurrency)
+        after = await measure(build_app(False, args.csv_rows), path, total, args.concurrency)
+        print(f"{path:<20} {before:>12.1f} {after:>12.1f} {after / before - 1:>+8.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Measure /sync/offline_data throughput (items/second) for several batch sizes.
+
+Usage: DATABASE_URL=postgresql+asyncpg://... python scripts/bench_sync_batch.py [--sizes 10,1000,10000]
+
+Runs against a migrated database. Every batch is applied inside a
+transaction that is rolled back, so nothing is left behind. The "per-item"
+column replays the old add-and-flush loop for comparison.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.sync_queue import SyncQueue  # noqa: E402
+from app.routers.sync import apply_sync_batch  # noqa: E402
+from app.schemas.sync_queue import SyncQueueItem  # noqa: E402
+
+
+async def _bench_user(db) -> int:
+    role_id = (await db.execute(text(
+        "INSERT INTO roles (name) VALUES ('bench-sync-role') RETURNING id"
+    ))).scalar()
+    return (await db.execute(text(
+        "INSERT INTO users (email, full_name, hashed_password, role_id) "
+        "VALUES ('bench-sync@example.invalid', 'Bench Sync', 'x', :role_id) RETURNING id"
+    ), {"role_id": role_id})).scalar()
+
+
+async def _per_item(db, user_id: int, items) -> None:
+    for item in items:
+        queue_item = SyncQueue(user_id=user_id, operation_type=item.operation_type,
+                               table_name=item.table_name, data=item.data, status="pending")
+        db.add(queue_item)
+        await db.flush()
+        db.add(Attendance(**item.data))
+        queue_item.status = "completed"
+    await db.flush()
+
+
+async def _timed(size: int, batched: bool) -> float:
+    async with SessionLocal() as db:
+        try:
+            user_id = await _bench_user(db)
+            items = [
+                SyncQueueItem(operation_type="create", table_name="attendance",
+                              data={"user_id": user_id, "present": True})
+                for _ in range(size)
+            ]
+            started = time.perf_counter()
+            if batched:
+                await apply_sync_batch(db, user_id, items)
+            else:
+                await _per_item(db, user_id, items)
+            return time.perf_counter() - started
+        finally:
+            await db.rollback()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,10000")
+    parser.add_argument("--skip-per-item", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'items':>7}  {'batched items/s':>15}  {'per-item items/s':>16}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        batched = size / await _timed(size, batched=True)
+        per_item = "-" if args.skip_per_item else f"{size / await _timed(size, batched=False):.0f}"
+        print(f"{size:>7}  {batched:>15.0f}  {per_item:>16}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
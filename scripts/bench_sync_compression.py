@@ -0,0 +1,77 @@
+"""Compare /sync/offline_data upload sizes and inflate cost for gzip and zstd.
+
+Usage: python scripts/bench_sync_compression.py [--sizes 100,1000,10000]
+
+Needs no database: batches shaped like the Flutter app's offline uploads are
+encoded with each Content-Encoding and pushed through
+RequestDecompressionMiddleware in front of an app that only reads the body.
+zstd is skipped when the zstandard package is not installed.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from app.core.request_decompression import RequestDecompressionMiddleware, zstandard  # noqa: E402
+
+
+def _batch(size: int) -> bytes:
+    items = [
+        {
+            "operation_type": "create",
+            "table_name": "attendance",
+            "client_op_id": f"op-{n:08d}",
+            "client_temp_id": f"tmp-{n:08d}",
+            "data": {"user_id": 42, "present": n % 7 != 0, "check_in": f"2024-05-{n % 28 + 1:02d}T09:00:00"},
+        }
+        for n in range(size)
+    ]
+    return json.dumps({"items": items}).encode()
+
+
+async def _read_body(scope, receive, send):
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _inflate_seconds(client: httpx.AsyncClient, body: bytes, encoding: str) -> float:
+    started = time.perf_counter()
+    response = await client.post("/sync/offline_data", content=body, headers={"content-encoding": encoding})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    args = parser.parse_args()
+
+    encoders = {"gzip": lambda raw: gzip.compress(raw, compresslevel=6)}
+    if zstandard is not None:
+        encoders["zstd"] = zstandard.ZstdCompressor(level=3).compress
+
+    app = RequestDecompressionMiddleware(_read_body)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        print(f"{'items':>7}  {'encoding':>8}  {'raw bytes':>10}  {'wire bytes':>10}  {'ratio':>6}  {'inflate MB/s':>12}")
+        for size in (int(value) for value in args.sizes.split(",")):
+            raw = _batch(size)
+            for encoding, encode in encoders.items():
+                body = encode(raw)
+                seconds = await _inflate_seconds(client, body, encoding)
+                print(f"{size:>7}  {encoding:>8}  {len(raw):>10}  {len(body):>10}  "
+                      f"{len(raw) / len(body):>6.1f}  {len(raw) / seconds / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
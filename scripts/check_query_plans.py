@@ -0,0 +1,147 @@
+"""Fail if a hot query falls back to a sequential scan on a seeded dataset.
+
+Usage: DATABASE_URL=postgresql+asyncpg://... python scripts/check_query_plans.py [--rows 20000]
+
+Run against a migrated database (python -m app.create_tables). Seed rows
+are inserted inside a transaction that is always rolled back, so a
+scratch copy of the schema is enough. Exits non-zero and lists the
+offending queries when any plan contains a Seq Scan on the table the
+query is meant to hit through an index.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# (label, table that must not be seq-scanned, SQL using :uid for a seeded user)
+HOT_QUERIES = [
+    ("task my-tasks", "tasks",
+     "SELECT * FROM tasks WHERE assigned_to_id = :uid"),
+    ("feedback history", "feedbacks",
+     "SELECT * FROM feedbacks WHERE intern_id = :uid ORDER BY created_at DESC"),
+    ("evaluations by intern", "evaluations",
+     "SELECT * FROM evaluations WHERE intern_id = :uid ORDER BY created_at DESC"),
+    ("notifications list", "notifications",
+     "SELECT * FROM notifications WHERE user_id = :uid ORDER BY created_at DESC"),
+    ("leaves by user", "leaves",
+     "SELECT * FROM leaves WHERE user_id = :uid"),
+    ("pending leaves count", "leaves",
+     "SELECT count(id) FROM leaves WHERE status = 'pending'"),
+    ("attendance by user", "attendance",
+     "SELECT * FROM attendance WHERE user_id = :uid"),
+    ("sync queue status", "sync_queue",
+     "SELECT count(id) FROM sync_queue WHERE user_id = :uid AND status = 'pending'"),
+    ("evaluation history", "admin_logs",
+     "SELECT * FROM admin_logs WHERE type IN ('evaluation_lock', 'evaluation_verdict', 'evaluation_final') "
+     "AND intern_id = :uid ORDER BY created_at DESC"),
+    ("final evaluation log", "admin_logs",
+     "SELECT * FROM admin_logs WHERE type = 'evaluation_final' AND project_id = 1 AND intern_id = :uid "
+     "ORDER BY created_at DESC LIMIT 1"),
+    ("current verdict", "verdicts",
+     "SELECT DISTINCT ON (intern_id) * FROM verdicts WHERE intern_id = :uid "
+     "ORDER BY intern_id, created_at DESC, id DESC"),
+    ("archive by current verdict", "verdicts",
+     "SELECT v.intern_id FROM verdicts v WHERE v.verdict = 'extend' AND NOT EXISTS ("
+     "SELECT 1 FROM verdicts n WHERE n.intern_id = v.intern_id AND (n.created_at > v.created_at "
+     "OR (n.created_at = v.created_at AND n.id > v.id)))"),
+    # Populated by the sync_changes triggers while the tables above are seeded.
+    ("sync changes page", "sync_changes",
+     "SELECT id, table_name, record_id, operation, txid FROM sync_changes "
+     "WHERE user_id = :uid AND id > 0 ORDER BY id LIMIT 501"),
+]
+
+SEED_STATEMENTS = [
+    "INSERT INTO roles (name) VALUES ('plancheck-role')",
+    """INSERT INTO users (email, full_name, hashed_password, role_id)
+       SELECT 'plancheck-' || g || '@example.invalid', 'Plan Check ' || g, 'x',
+              (SELECT id FROM roles WHERE name = 'plancheck-role')
+       FROM generate_series(1, :users) g""",
+    """INSERT INTO projects (name, description)
+       SELECT 'plancheck-project-' || g, '' FROM generate_series(1, 50) g""",
+    """CREATE TEMP TABLE plancheck_ids ON COMMIT DROP AS SELECT
+       (SELECT array_agg(id) FROM users WHERE email LIKE 'plancheck-%') AS users,
+       (SELECT array_agg(id) FROM projects WHERE name LIKE 'plancheck-project-%') AS projects""",
+    """INSERT INTO tasks (project_id, title, description, status, assigned_to_id, progress)
+       SELECT projects[1 + g % 50], 't', '', 'pending', users[1 + g % :users], 0
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO feedbacks (project_id, intern_id, pm_id, feedback_text, rating)
+       SELECT projects[1 + g % 50], users[1 + g % :users], users[1 + (g + 1) % :users], 'f', 1 + g % 5
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO evaluations (evaluator_id, intern_id, project_id, stars)
+       SELECT users[1 + (g + 1) % :users], users[1 + g % :users], projects[1 + g % 50], 1 + g % 5
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO notifications (user_id, title, message)
+       SELECT users[1 + g % :users], 'n', 'n' FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO leaves (user_id, start_date, end_date, status)
+       SELECT users[1 + g % :users], current_date, current_date,
+              CASE WHEN g % 20 = 0 THEN 'pending' ELSE 'approved' END
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO attendance (user_id, date, present)
+       SELECT users[1 + g % :users], now(), true FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO sync_queue (user_id, operation_type, table_name, data, status)
+       SELECT users[1 + g % :users], 'create', 'tasks', '{}'::json,
+              CASE WHEN g % 10 = 0 THEN 'pending' ELSE 'completed' END
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO admin_logs (type, message, meta, intern_id, project_id)
+       SELECT (ARRAY['evaluation_lock', 'evaluation_verdict', 'evaluation_final', 'report'])[1 + g % 4], 'm',
+              json_build_object('intern_id', users[1 + g % :users]), users[1 + g % :users], projects[1 + g % 50]
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+    """INSERT INTO verdicts (intern_id, verdict, submitted_by)
+       SELECT users[1 + g % :users],
+              CASE WHEN g % 50 = 0 THEN 'extend' WHEN g % 2 = 0 THEN 'pass' ELSE 'fail' END,
+              users[1 + (g + 1) % :users]
+       FROM plancheck_ids, generate_series(1, :rows) g""",
+]
+
+
+def _seq_scans(plan: dict, table: str) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child, table))
+    return found
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    failures = []
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            params = {"rows": args.rows, "users": args.users}
+            for statement in SEED_STATEMENTS:
+                await conn.execute(text(statement), params)
+            tables = {table for _, table, _ in HOT_QUERIES}
+            for table in sorted(tables):
+                await conn.execute(text(f"ANALYZE {table}"))
+            uid = (await conn.execute(text("SELECT users[1] FROM plancheck_ids"))).scalar()
+
+            for label, table, sql in HOT_QUERIES:
+                result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), {"uid": uid})
+                plan = result.scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                status = "FAIL" if _seq_scans(plan[0]["Plan"], table) else "ok"
+                print(f"{status:>4}  {label}")
+                if status == "FAIL":
+                    failures.append(label)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+    if failures:
+        print(f"\n{len(failures)} hot query(ies) use a sequential scan: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Summarize `python -X importtime` for a worker's cold start.
+
+Usage: python scripts/importtime_summary.py [--module app.main] [--top 15]
+
+Imports the module in a fresh interpreter and prints total import time,
+the slowest top-level packages by cumulative time, peak RSS of the child
+process, and whether the optional heavy dependencies (reportlab,
+firebase_admin) were loaded eagerly.
+"""
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+WATCHED = ("reportlab", "firebase_admin")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr.splitlines()[-1] if proc.stderr else "import failed", file=sys.stderr)
+        sys.exit(proc.returncode)
+
+    per_package = defaultdict(int)
+    total_us = 0
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        total_us += self_us
+        loaded.add(name.split(".")[0])
+        if len(indent) == 1:  # direct imports of the interpreter's top level
+            per_package[name.split(".")[0]] += cumulative_us
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"module: {args.module}")
+    print(f"total import time: {total_us / 1000:.1f} ms")
+    print(f"peak RSS of importing process: {peak_rss_kb / 1024:.1f} MiB")
+    for name in WATCHED:
+        print(f"{name} loaded at import: {'yes' if name in loaded else 'no'}")
+    print(f"\n{'package':<30} {'cumulative ms':>14}")
+    for name, cumulative_us in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<30} {cumulative_us / 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()